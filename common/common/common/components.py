@@ -1,17 +1,34 @@
 from abc import ABCMeta, abstractmethod
+import base64
+import concurrent.futures
+import contextlib
 import dataclasses
+from datetime import datetime
 import functools
+import hashlib
 import inspect
 import importlib
 import importlib.util
+import json
 import logging
 from pathlib import Path
+import re
+import threading
+import time
 import traceback as tb
 
-# from browsermobproxy import Server
+import scrapy.exceptions
+import scrapy.settings
+import scrapy.signals
 import scrapy.utils.conf as sconf
 import scrapy
+from selenium.common.exceptions import (NoSuchElementException,
+                                        StaleElementReferenceException,
+                                        TimeoutException)
 import selenium.webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions
+from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.remote.remote_connection import LOGGER as selenium_logger
 import six
 
@@ -184,6 +201,393 @@ class SCSpider2SpiderMixin(ComposableSpiderMixin):
             yield req
 
 
+class SpeculativePaginationMixin(scrapy.Spider):
+    '''
+    Mixin for fetching paginated listings in parallel.
+
+    Normally, URL of page N+1 is known only after page N is downloaded, so
+    the listing pages are fetched one after another. Instead, the mixin learns
+    the URL pattern of the listing pages from the "next page" link of the
+    first page (e.g. `/events/page/2/`) and requests several pages ahead
+    at once. Once a page is empty, missing (404) or has no "next page" link,
+    no further pages are requested.
+
+    Spider calls `paginate` from the callback that parses the listing pages.
+    If the URL pattern cannot be learned (page number not found in the URL,
+    or the URL has signed or changing query parameters, see
+    `util.page_url_template`), the "next page" link is followed as usual.
+    The same happens if a guessed page fails while the page before it has
+    a "next page" link to a different URL; the URL pattern is not used for
+    the listing from then on.
+
+    Mixin uses following variables:
+
+    - `pagination_window` - number of pages requested ahead of the last
+                            downloaded page. Default: `4`
+    '''
+
+    pagination_window = 4
+
+    def __init__(self, pagination_window=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if pagination_window:
+            self.pagination_window = int(pagination_window)
+
+        # URL template -> state of the listing, see `_pagination_state`
+        self._pagination = {}
+
+    def paginate(self, response, next_page_url, has_entries, callback=None,
+                 meta=None):
+        '''
+        Yield requests for the listing pages following `response`.
+
+        `next_page_url` is the (possibly relative) "next page" link found in
+        the response or `None`, `has_entries` tells whether any entries were
+        found on the page. Requests are passed to `callback` (default `parse`)
+        with `meta` added to their meta.
+        '''
+
+        callback = callback or self.parse
+        template = response.meta.get('pagination_template')
+        page = response.meta.get('pagination_page', 1)
+        if next_page_url is not None:
+            next_page_url = response.urljoin(next_page_url)
+
+        if template is False:
+            # URL pattern was dropped, only "next page" links are followed
+            if next_page_url is not None and response.status != 404:
+                yield scrapy.Request(next_page_url, callback=callback, meta={
+                    **(meta or {}), 'pagination_template': False})
+            return
+
+        if template is None:
+            if next_page_url is None or response.status == 404:
+                return
+            template = util.page_url_template(next_page_url, page + 1,
+                                              previous_url=response.url)
+            if template is None:
+                self.logger.debug('Cannot guess URLs of pages from URL "{}", '
+                                  'following next page link'.format(
+                                      next_page_url))
+                yield scrapy.Request(next_page_url, callback=callback, meta={
+                    **(meta or {}), 'pagination_template': False})
+                return
+            self._pagination.setdefault(
+                template, self._pagination_state(page))
+
+        state = self._pagination[template]
+        if state['dropped']:
+            return
+        if response.status == 404 or not has_entries:
+            state['failed'].add(page)
+            end = page
+        elif next_page_url is None:
+            end = page + 1
+        else:
+            state['next_links'][page] = next_page_url
+            end = None
+
+        # Guessed page failed, but the page before links to another URL
+        for failed in sorted(state['failed']):
+            link = state['next_links'].get(failed - 1)
+            if link is not None and link != self._page_url(template, failed):
+                self.logger.debug('Guessed page "{}" failed, following next '
+                                  'page link "{}" instead'.format(
+                                      self._page_url(template, failed), link))
+                state['dropped'] = True
+                yield scrapy.Request(link, callback=callback, meta={
+                    **(meta or {}), 'pagination_template': False})
+                return
+
+        if end is not None:
+            state['end'] = end if state['end'] is None \
+                else min(state['end'], end)
+            return
+
+        last_page = page + self.pagination_window
+        if state['end'] is not None:
+            last_page = min(last_page, state['end'] - 1)
+
+        for next_page in range(state['requested'] + 1, last_page + 1):
+            yield scrapy.Request(
+                self._page_url(template, next_page),
+                callback=callback,
+                meta={
+                    **(meta or {}),
+                    'pagination_template': template,
+                    'pagination_page': next_page,
+                    'handle_httpstatus_list': [404],
+                },
+            )
+        state['requested'] = max(state['requested'], last_page)
+
+    def _pagination_state(self, page):
+        return {
+            # Last requested page
+            'requested': page,
+            # First page past the end of the listing
+            'end': None,
+            # Pages that were missing or empty
+            'failed': set(),
+            # Page -> URL of its "next page" link
+            'next_links': {},
+            # Whether URL pattern turned out wrong
+            'dropped': False,
+        }
+
+    def _page_url(self, template, page):
+        prefix, suffix = template
+        return f'{prefix}{page}{suffix}'
+
+
+class AspNetPaginationMixin(scrapy.Spider):
+    '''
+    Mixin for fetching pages of ASP.NET WebForms grids (GridView) in parallel.
+
+    Grid pages are requested with postbacks that carry the page's viewstate,
+    so following the `Page$Next` postbacks forces the pages to be fetched
+    one after another. Instead, the mixin captures the viewstate of the first
+    page and requests `Page$N` postbacks for several pages ahead at once.
+
+    Servers with event validation reject postback arguments not rendered
+    on the page (typically with HTTP 500). If that happens, or the page jumps
+    are otherwise not accepted, the mixin falls back to the chain of
+    `Page$Next` postbacks. Rows of pages that were already fetched are
+    not returned again.
+
+    Spider calls `aspnet_paginate` from the callback that parses the grid
+    pages.
+
+    Mixin uses following variables:
+
+    - `aspnet_grid` - ID of the grid control (`__EVENTTARGET` of the pager
+                      postbacks).
+
+    - `aspnet_pagination_window` - number of pages requested ahead of the last
+                                   downloaded page. Default: `4`
+    '''
+
+    aspnet_grid = None
+    aspnet_pagination_window = 4
+
+    def __init__(self, aspnet_pagination_window=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if aspnet_pagination_window:
+            self.aspnet_pagination_window = int(aspnet_pagination_window)
+
+        self._aspnet_pagination = {}
+
+    def aspnet_form_data(self, response):
+        '''Get values of the hidden ASP.NET state fields (`__VIEWSTATE`, ...)'''
+
+        fields = response.xpath('//input[@type="hidden"][starts-with(@name, "__")]')
+        return {
+            field.xpath('@name').get(): field.xpath('@value').get(default='')
+            for field in fields
+        }
+
+    def aspnet_postback(self, response, argument, target=None, form_data=None,
+                        **kwargs):
+        '''
+        Create a postback request to the page of `response`.
+
+        `form_data` are the state fields of the page (default: those of
+        `response`). Other keyword arguments are passed to `FormRequest`.
+        '''
+
+        data = dict(form_data if form_data is not None
+                    else self.aspnet_form_data(response))
+        data['__EVENTTARGET'] = target or self.aspnet_grid
+        data['__EVENTARGUMENT'] = argument
+        return scrapy.FormRequest(response.url, formdata=data, **kwargs)
+
+    def aspnet_paginate(self, response, rows, callback=None):
+        '''
+        Get requests for the grid pages following `response`.
+
+        `rows` are the grid rows found in the response, as strings or
+        selectors. Returns tuple `(requests, rows)`, where `rows` is empty
+        if the page is a duplicate of an already fetched page or an error page.
+        '''
+
+        callback = callback or self.parse
+        page = response.meta.get('aspnet_page', 1)
+        mode = response.meta.get('aspnet_mode')
+        state = self._aspnet_pagination.setdefault(
+            (response.meta.get('aspnet_url', response.url), self.aspnet_grid),
+            {'form_data': None, 'requested': 1, 'end': None,
+             'chained': False, 'seen': set()})
+
+        def request(page, argument, mode, form_data, response=response):
+            return self.aspnet_postback(
+                response, argument, form_data=form_data, callback=callback,
+                meta={
+                    'aspnet_page': page,
+                    'aspnet_mode': mode,
+                    'aspnet_url': response.meta.get('aspnet_url', response.url),
+                    'handle_httpstatus_list': [500],
+                    'dont_retry': mode == 'jump',
+                },
+                dont_filter=True,
+            )
+
+        def chain(response, page, form_data=None):
+            return [request(page, 'Page$Next', 'chain', form_data, response)]
+
+        if response.status >= 400:
+            if mode == 'jump':
+                if state['chained']:
+                    return [], []
+                state['chained'] = True
+                self.logger.info('Server rejected direct jump to page {} of '
+                                 'grid "{}", following next page postbacks '
+                                 'instead'.format(page, self.aspnet_grid))
+                return chain(response, 2, state['form_data']), []
+            self.logger.error('Failed to fetch page {} of grid "{}" '
+                              '(HTTP {})'.format(page, self.aspnet_grid,
+                                                 response.status))
+            return [], []
+
+        has_next = response.xpath(
+            '//a[contains(@href, "Page$Next")]').get() is not None
+        rows_fp = hashlib.sha1('\n'.join(
+            row if isinstance(row, str) else row.get() for row in rows
+        ).encode('utf-8')).hexdigest()
+        is_new = bool(rows) and rows_fp not in state['seen']
+        state['seen'].add(rows_fp)
+        new_rows = rows if is_new else []
+
+        if mode == 'chain':
+            if not has_next or not rows:
+                return [], new_rows
+            return chain(response, page + 1), new_rows
+
+        if mode is None:
+            state['form_data'] = self.aspnet_form_data(response)
+        elif state['chained']:
+            # Pages are fetched by the chain of next page postbacks instead
+            return [], new_rows
+
+        if not is_new:
+            # Servers return last page if the page number is out of range
+            end = page
+        elif not has_next:
+            end = page + 1
+        else:
+            end = None
+        if end is not None:
+            state['end'] = end if state['end'] is None else min(state['end'], end)
+            return [], new_rows
+
+        last_page = page + self.aspnet_pagination_window
+        if state['end'] is not None:
+            last_page = min(last_page, state['end'] - 1)
+
+        requests = [
+            request(next_page, f'Page${next_page}', 'jump', state['form_data'])
+            for next_page in range(state['requested'] + 1, last_page + 1)
+        ]
+        state['requested'] = max(state['requested'], last_page)
+        return requests, new_rows
+
+
+class ListingChangeDetectionMixin(scrapy.Spider):
+    '''
+    Mixin for closing the spider early if the listing of all entries did not
+    change since the last run.
+
+    Spider calls `detect_listing_change` with the listing content (entries,
+    text or raw body). The content is normalized, hashed and compared with
+    the hash stored by the last finished run. If it's the same, the spider is
+    closed with reason `listing_unchanged` and `listing_unchanged` attribute
+    is set, so `CsvWriterPipeline` doesn't write an empty output. The new hash
+    is stored only once the spider finishes successfully.
+
+    Mixin uses following settings:
+
+    - `CHANGEDETECTION_ENABLED` - Default: `True`
+
+    - `CHANGEDETECTION_PATH` - path to the SQLite database with the hashes.
+                               Default: `'data/listing_hashes.sqlite'`
+    '''
+
+    schema = '''
+        CREATE TABLE IF NOT EXISTS listing_hashes (
+            spider TEXT NOT NULL,
+            listing TEXT NOT NULL,
+            hash TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (spider, listing)
+        );
+    '''
+
+    listing_unchanged = False
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider._listing_hashes = {}
+        crawler.signals.connect(spider._store_listing_hashes,
+                                signal=scrapy.signals.spider_closed)
+        return spider
+
+    def detect_listing_change(self, content, listing='listing'):
+        '''
+        Close the spider if `content` of `listing` is the same as in the last
+        run. `content` can be a string, bytes, or a list of strings or
+        selectors.
+        '''
+
+        if not self.settings.getbool('CHANGEDETECTION_ENABLED', True):
+            return
+
+        digest = self._listing_hash(content)
+        self._listing_hashes[listing] = digest
+
+        conn = self._listing_hashes_db()
+        row = conn.execute(
+            'SELECT hash, updated_at FROM listing_hashes '
+            'WHERE spider = ? AND listing = ?',
+            (self.name, listing)).fetchone()
+        conn.close()
+        if row is None or row[0] != digest:
+            return
+
+        self.logger.info('Listing "{}" did not change since {}, closing '
+                         'spider'.format(listing, row[1]))
+        self.listing_unchanged = True
+        raise scrapy.exceptions.CloseSpider('listing_unchanged')
+
+    def _listing_hash(self, content):
+        if not isinstance(content, (str, bytes)):
+            content = '\n'.join(
+                c if isinstance(c, str) else c.get() for c in content)
+        if isinstance(content, str):
+            # Whitespace differences are not considered a change
+            content = ' '.join(content.split()).encode('utf-8')
+        return hashlib.sha1(content).hexdigest()
+
+    def _listing_hashes_db(self):
+        path = self.settings.get('CHANGEDETECTION_PATH',
+                                 'data/listing_hashes.sqlite')
+        return util.sqlite_connect(path, self.schema)
+
+    def _store_listing_hashes(self, spider, reason):
+        if reason != 'finished' or not self._listing_hashes:
+            return
+
+        updated_at = datetime.now().isoformat(timespec='seconds')
+        conn = self._listing_hashes_db()
+        with conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO listing_hashes VALUES (?, ?, ?, ?)',
+                [(self.name, listing, digest, updated_at)
+                 for listing, digest in self._listing_hashes.items()])
+        conn.close()
+
+
 class TimeTaggedMixin():
 
     def __init__(self, *args, **kwargs):
@@ -379,6 +783,284 @@ class LocalSettingsSpiderMixin(scrapy.Spider):
                                spkls_name, settings_path, tb.format_exc()))
 
 
+class BrowserWait():
+    '''
+    Condition-based waits for webdriver, so pages are waited for only as long
+    as they need to load, at most `timeout` seconds.
+
+    Waits raise `selenium.common.exceptions.TimeoutException` on timeout.
+    Exceptions listed in `ignored_exceptions` (e.g. element not found yet)
+    raised by the condition are treated as the condition not being met.
+    '''
+
+    def __init__(self, webdriver, timeout=10, poll_frequency=0.1,
+                 ignored_exceptions=(NoSuchElementException,
+                                     StaleElementReferenceException)):
+        self.webdriver = webdriver
+        self.timeout = timeout
+        self.poll_frequency = poll_frequency
+        self.ignored_exceptions = ignored_exceptions
+
+    def until(self, predicate, timeout=None, message=''):
+        '''
+        Wait until `predicate` called with the webdriver returns a truthy
+        value, and return it.
+        '''
+        wait = WebDriverWait(
+            self.webdriver,
+            timeout if timeout is not None else self.timeout,
+            poll_frequency=self.poll_frequency,
+            ignored_exceptions=self.ignored_exceptions)
+        return wait.until(predicate, message)
+
+    def until_element(self, xpath, timeout=None):
+        '''Wait until element matching `xpath` is in the DOM, and return it'''
+        return self.until(
+            expected_conditions.presence_of_element_located(
+                (By.XPATH, xpath)),
+            timeout, message=f'Element "{xpath}" not found')
+
+    def until_stale(self, element, timeout=None):
+        '''Wait until `element` is removed from the DOM, e.g. page changed'''
+        return self.until(expected_conditions.staleness_of(element),
+                          timeout, message='Element is still attached')
+
+    def until_network_idle(self, idle_time=0.5, timeout=None):
+        '''
+        Wait until the document is loaded and no new resources (scripts, XHR,
+        images, ...) finished loading for `idle_time` seconds.
+        '''
+        state = {'count': None, 'changed_at': time.time()}
+
+        def is_idle(wd):
+            ready, count = wd.execute_script(
+                'return [document.readyState, '
+                'performance.getEntriesByType("resource").length];')
+            now = time.time()
+            if ready != 'complete' or count != state['count']:
+                state.update(count=count, changed_at=now)
+                return False
+            return now - state['changed_at'] >= idle_time
+
+        return self.until(is_idle, timeout, message='Network is not idle')
+
+
+class WebdriverPool():
+    '''
+    Thread-safe pool of webdriver instances.
+
+    Webdrivers are created with `factory` when needed, up to `size` instances.
+    `warmup` instances are started when the pool is created. Idle webdrivers
+    are health-checked before they're handed out, and recycled after serving
+    `max_uses` borrowers or when they crash. Webdrivers not borrowed for
+    `idle_timeout` seconds are shut down, `None` keeps them running until
+    the pool is closed.
+
+    Borrow a webdriver with `acquire` and give it back with `release`, or use
+    the `webdriver` context manager. If all webdrivers are in use, `acquire`
+    waits at most `timeout` seconds for one to be released.
+
+    Use `get_shared` to share a pool between spiders. Shared pool is shut down
+    once all its users call `close`.
+    '''
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, factory, size=2, warmup=0, max_uses=100, timeout=None,
+                 idle_timeout=None):
+        self.factory = factory
+        self.size = max(size, 1)
+        self.max_uses = max_uses
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.logger = logging.getLogger(__name__)
+
+        self._idle = []
+        self._idle_since = {}
+        self._uses = {}
+        self._reaper = None
+        self._reaper_wakeup = threading.Event()
+        self._lock = threading.Condition()
+        self._key = None
+        self._users = 1
+        self.closed = False
+
+        self.warm_up(warmup)
+
+    @classmethod
+    def get_shared(cls, key, factory, **kwargs):
+        '''Get pool shared under `key`, creating it if it does not exist'''
+        with cls._shared_lock:
+            pool = cls._shared.get(key)
+            if pool is not None and not pool.closed:
+                with pool._lock:
+                    pool._users += 1
+                return pool
+            pool = cls._shared[key] = cls(factory, **kwargs)
+            pool._key = key
+            return pool
+
+    def warm_up(self, count):
+        '''Start up to `count` webdrivers ahead of time'''
+        for _ in range(min(count, self.size)):
+            with self._lock:
+                if len(self._uses) >= self.size:
+                    return
+                # Reserve the slot until the webdriver is created
+                self._uses[object()] = 0
+            driver = self._create()
+            self._put_idle(driver)
+
+    def acquire(self, timeout=None):
+        timeout = timeout if timeout is not None else self.timeout
+        deadline = time.time() + timeout if timeout is not None else None
+        while True:
+            with self._lock:
+                driver = self._wait_for_driver(deadline)
+            if driver is None:
+                return self._create()
+            if self.is_healthy(driver):
+                return driver
+            self.logger.debug('Replacing unresponsive webdriver')
+            self._discard(driver)
+
+    def release(self, driver, check=False):
+        '''
+        Return webdriver to the pool. If `check` is set, the webdriver is
+        health-checked first (e.g. after it raised an error).
+        '''
+        with self._lock:
+            if id(driver) not in self._uses:
+                # Not from this pool
+                recycle = True
+            else:
+                self._uses[id(driver)] += 1
+                recycle = self.closed \
+                    or (self.max_uses and
+                        self._uses[id(driver)] >= self.max_uses)
+        if recycle or (check and not self.is_healthy(driver)):
+            self._discard(driver)
+            return
+        self._put_idle(driver)
+
+    @contextlib.contextmanager
+    def webdriver(self, timeout=None):
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        except Exception:
+            self.release(driver, check=True)
+            raise
+        self.release(driver)
+
+    def is_healthy(self, driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def close(self):
+        '''Quit idle webdrivers once all users of the pool closed it'''
+        with self._lock:
+            self._users -= 1
+            if self._users > 0:
+                return
+            self.closed = True
+            idle, self._idle = self._idle, []
+            self._idle_since.clear()
+            self._lock.notify_all()
+        self._reaper_wakeup.set()
+        with self._shared_lock:
+            if self._shared.get(self._key) is self:
+                del self._shared[self._key]
+        for driver in idle:
+            self._discard(driver)
+
+    def _wait_for_driver(self, deadline):
+        # Must be called with the lock held. Returns an idle webdriver or
+        # None if a new one may be created.
+        while True:
+            if self.closed:
+                raise RuntimeError('Webdriver pool is closed')
+            if self._idle:
+                driver = self._idle.pop()
+                self._idle_since.pop(id(driver), None)
+                return driver
+            if len(self._uses) < self.size:
+                # Reserve the slot until the webdriver is created
+                self._uses[object()] = 0
+                return None
+            remaining = deadline - time.time() if deadline else None
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError('No webdriver available in the pool')
+            self._lock.wait(remaining)
+
+    def _put_idle(self, driver):
+        with self._lock:
+            self._idle.append(driver)
+            self._idle_since[id(driver)] = time.time()
+            self._lock.notify()
+            if self.idle_timeout and self._reaper is None:
+                self._reaper = threading.Thread(
+                    target=self._evict_idle, name='WebdriverPoolReaper',
+                    daemon=True)
+                self._reaper.start()
+
+    def _evict_idle(self):
+        # Runs in the reaper thread while there are idle webdrivers
+        while True:
+            with self._lock:
+                if self.closed or not self._idle:
+                    self._reaper = None
+                    return
+                now = time.time()
+                expired = [
+                    driver for driver in self._idle
+                    if now - self._idle_since[id(driver)] >= self.idle_timeout
+                ]
+                for driver in expired:
+                    self._idle.remove(driver)
+                    del self._idle_since[id(driver)]
+                wait = min(self._idle_since.values(), default=now) \
+                    + self.idle_timeout - now
+            for driver in expired:
+                self.logger.debug('Shutting down webdriver idle for more '
+                                  'than {}s'.format(self.idle_timeout))
+                self._discard(driver)
+            if not expired:
+                self._reaper_wakeup.wait(max(wait, 0))
+
+    def _create(self):
+        try:
+            driver = self.factory()
+        except Exception:
+            with self._lock:
+                self._free_reserved_slot()
+                self._lock.notify()
+            raise
+        with self._lock:
+            self._free_reserved_slot()
+            self._uses[id(driver)] = 0
+        return driver
+
+    def _free_reserved_slot(self):
+        for key, uses in self._uses.items():
+            if not isinstance(key, int):
+                del self._uses[key]
+                return
+
+    def _discard(self, driver):
+        with self._lock:
+            self._uses.pop(id(driver), None)
+            self._lock.notify()
+        try:
+            driver.quit()
+        except Exception as e:
+            self.logger.debug('Failed to quit webdriver. Reason: {}'.format(e))
+
+
 class SeleniumSpiderMixin(scrapy.Spider):
     '''
     This Mixin enables to uses selenium to get website info.
@@ -404,6 +1086,16 @@ class SeleniumSpiderMixin(scrapy.Spider):
                             Default: `None`
 
     - `browser_loglevel` - Log level of webdriver instance.
+
+    - `browser_idle_timeout` - Seconds after which an unused webdriver is
+                            returned to the pool, and after which the pool
+                            shuts down webdrivers nobody borrowed. It's
+                            started again when accessed. `None` keeps it
+                            running until the spider closes. Default: `300`
+
+    The webdriver is borrowed from `webdriver_pool` on first access of
+    `webdriver` property, so spiders that don't need the browser in a run
+    don't start it at all. Closing the webdriver returns it to the pool.
     '''
 
     browser = 'chrome'
@@ -412,10 +1104,12 @@ class SeleniumSpiderMixin(scrapy.Spider):
     browser_cookies = None
     browser_cookies_url = None
     browser_loglevel = logging.INFO
+    browser_idle_timeout = 300
 
     def __init__(self, browser=None, headless=None, browser_options=None,
                  browser_cookies=None, browser_cookies_url=None,
-                 browser_loglevel=None, *args, **kwargs):
+                 browser_loglevel=None, browser_idle_timeout=None,
+                 *args, **kwargs):
 
         super().__init__(*args, **kwargs)
 
@@ -439,43 +1133,152 @@ class SeleniumSpiderMixin(scrapy.Spider):
         if browser_loglevel:
             self.browser_loglevel = browser_loglevel or \
                 self.logger.getEffectiveLevel()
+        if browser_idle_timeout is not None:
+            self.browser_idle_timeout = float(browser_idle_timeout) or None
+
+        self._webdriver = None
+        self._webdriver_used_at = None
+        self._webdriver_pool = None
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        crawler.signals.connect(spider._close_webdriver_pool,
+                                signal=scrapy.signals.spider_closed)
+        return spider
+
+    @property
+    def webdriver_pool(self):
+        '''
+        Pool of webdrivers shared by all spiders with the same browser setup
+        in the process. Configured with `WEBDRIVER_POOL_*` settings.
+        '''
+        if self._webdriver_pool is None:
+            settings = getattr(self, 'settings', None) \
+                or scrapy.settings.Settings()
+            key = self._webdriver_pool_key()
+            factory = functools.partial(
+                self._create_webdriver, self.browser, self.browser_options,
+                headless=self.headless, loglevel=self.browser_loglevel)
+            self._webdriver_pool = WebdriverPool.get_shared(
+                key, factory,
+                size=settings.getint('WEBDRIVER_POOL_SIZE', 2),
+                warmup=settings.getint('WEBDRIVER_POOL_WARMUP', 0),
+                max_uses=settings.getint('WEBDRIVER_POOL_MAX_USES', 100),
+                timeout=settings.getfloat('WEBDRIVER_POOL_TIMEOUT', 60),
+                idle_timeout=self.browser_idle_timeout)
+        return self._webdriver_pool
 
-        self._setup_webdriver(self.browser, self.browser_options,
-                             headless=self.headless, loglevel=self.browser_loglevel)
+    @property
+    def webdriver(self):
+        '''Webdriver instance, borrowed from the pool on first access'''
+        if self._webdriver is None:
+            self._webdriver = self.webdriver_pool.acquire()
+            self._schedule_idle_check(self.browser_idle_timeout)
+        self._webdriver_used_at = time.time()
+        return self._webdriver
+
+    @webdriver.setter
+    def webdriver(self, webdriver):
+        self._webdriver = webdriver
 
     def run_webdriver_tasks(
         self,
-        webdriver,
-        tasks,
+        webdriver=None,
+        tasks=None,
         cookies=None,
         start_url=None,
+        parallel=False,
+        max_workers=None,
     ):
         '''
         Execute a list of tasks within a single webdriver context.
 
         Tasks are functions that accept webdriver as the only argument.
+        Returns results of the tasks in the order of the tasks.
+
+        If `webdriver` is not given, a webdriver is borrowed from the
+        `webdriver_pool` for the duration of the tasks. Webdriver that
+        crashed while running the tasks is replaced in the pool.
+
+        If `parallel` is set, tasks are independent and run concurrently,
+        each on its own webdriver borrowed from the `webdriver_pool`. At most
+        `max_workers` tasks run at once. Default: size of the pool
 
         Optionally, specify cookies to be used throughout the selenium session,
         and initial URL to load (Selenium needs to load a page first to be able
         to assign cookies). By default, these are instance properties 
-        `browser_cookies` and `browser_cookies_url`.
+        `browser_cookies` and `browser_cookies_url`. In parallel mode, they're
+        applied for each task, as the tasks run on different webdrivers.
         '''
 
         cks = cookies or self.browser_cookies
         url = start_url or self.browser_cookies_url
 
-        with webdriver as wd:
-            if url:
-                wd.get(url)
-            if cks:
-                # Cookies can be passed only after webdriver was initialized
-                # with a website
-                self.logger.debug('Setting cookies for webdriver tasks')
-                util.lmap(wd.add_cookie, cks)
-            self.logger.debug('Running webdriver tasks')
-            results = util.lmap(lambda fn: fn(wd), tasks)
-            self.logger.debug('Closing webdriver')
-        return results
+        if parallel:
+            if webdriver is not None:
+                raise ValueError('Parallel tasks run on webdrivers from the '
+                                 'pool, webdriver cannot be given')
+            return self._run_webdriver_tasks_parallel(tasks or [], cks, url,
+                                                      max_workers)
+        if webdriver is not None:
+            return self._run_webdriver_tasks(webdriver, tasks or [], cks, url)
+        with self.webdriver_pool.webdriver() as wd:
+            return self._run_webdriver_tasks(wd, tasks or [], cks, url)
+
+    def _run_webdriver_tasks_parallel(self, tasks, cookies=None,
+                                      start_url=None, max_workers=None):
+        pool = self.webdriver_pool
+
+        def run(task):
+            with pool.webdriver() as wd:
+                return self._run_webdriver_tasks(wd, [task], cookies,
+                                                 start_url)[0]
+
+        workers = min(max_workers or pool.size, len(tasks)) or 1
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            return list(executor.map(run, tasks))
+
+    def _run_webdriver_tasks(self, wd, tasks, cookies=None, start_url=None):
+        if start_url:
+            wd.get(start_url)
+        if cookies:
+            # Cookies can be passed only after webdriver was initialized
+            # with a website
+            self.logger.debug('Setting cookies for webdriver tasks')
+            util.lmap(wd.add_cookie, cookies)
+        self.logger.debug('Running webdriver tasks')
+        return util.lmap(lambda fn: fn(wd), tasks)
+
+    def _close_webdriver(self, *args, **kwargs):
+        webdriver, self._webdriver = self._webdriver, None
+        if webdriver is not None:
+            self.logger.debug('Returning webdriver to the pool')
+            self.webdriver_pool.release(webdriver)
+
+    def _close_webdriver_pool(self, *args, **kwargs):
+        self._close_webdriver()
+        if self._webdriver_pool is not None:
+            self._webdriver_pool.close()
+            self._webdriver_pool = None
+
+    def _schedule_idle_check(self, delay):
+        if not self.browser_idle_timeout:
+            return
+        from twisted.internet import reactor
+        # Webdriver may be first accessed from a worker thread
+        reactor.callFromThread(reactor.callLater, delay,
+                               self._check_idle_webdriver)
+
+    def _check_idle_webdriver(self):
+        if self._webdriver is None:
+            return
+        idle = time.time() - self._webdriver_used_at
+        if idle < self.browser_idle_timeout:
+            self._schedule_idle_check(self.browser_idle_timeout - idle)
+            return
+        self.logger.debug('Webdriver idle for {:.0f}s'.format(idle))
+        self._close_webdriver()
 
     def _setup_webdriver(
         self,
@@ -484,7 +1287,20 @@ class SeleniumSpiderMixin(scrapy.Spider):
         headless=None,
         loglevel=None
     ):
-        '''Set up a webdriver instance'''
+        '''Set up a webdriver instance owned by the spider'''
+
+        self.webdriver = self._create_webdriver(browser, browser_options,
+                                                headless, loglevel)
+        return self.webdriver
+
+    def _create_webdriver(
+        self,
+        browser=None,
+        browser_options=None,
+        headless=None,
+        loglevel=None
+    ):
+        '''Create a new webdriver instance'''
 
         brw_name = browser if browser is not None else self.browser
         brw_options = browser_options if browser_options is not None else self.browser_options
@@ -500,8 +1316,11 @@ class SeleniumSpiderMixin(scrapy.Spider):
 
         self.logger.debug('Initializing webdriver "{}" with options {}.'
                           .format(brw_name, brw_options))
-        self.webdriver = brw.webdriver.WebDriver(options=opt)
-        return self.webdriver
+        return brw.webdriver.WebDriver(options=opt)
+
+    def _webdriver_pool_key(self):
+        '''Spiders share the pool if their keys are equal'''
+        return (self.browser, self.headless, tuple(self.browser_options))
 
     def _get_webdriver_options(self, browserclass):
         class NullOptions:
@@ -517,108 +1336,189 @@ class SeleniumSpiderMixin(scrapy.Spider):
         return getattr(selenium.webdriver, brw)
 
 
-# class BrowsermobSeleniumSpiderMixin(SeleniumSpiderMixin):
-#     '''
-#     This Mixin enables to uses selenium proxied via BrowserMob Proxy.
-
-#     BrowserMob Proxy or BrowserUp Proxy executable is required.
-
-#     On some websites, spiders may need to run frontend code to generate
-#     initial session ID necessary for valid API requests. In other cases
-#     website may need to be rendered to obtain relevant data. In those
-#     cases, Selenium or Splash are necessary.
-
-#     BrowserMobProxy enables network interception or traffic monitoring. For
-#     more info, see https://browsermob-proxy-py.readthedocs.io/en/stable/ and
-#     https://github.com/browserup/browserup-proxy.
+class BrowserSessionMixin(SeleniumSpiderMixin):
+    '''
+    Mixin for spiders that need the browser only to obtain a session.
 
-#     Mixin uses following variables:
+    Browser loads `browser_session_url` once, and its cookies, local storage
+    and user agent are harvested into `browser_session`. Requests are then
+    downloaded over plain HTTP with the session cookies and headers (see
+    `event.downloader_middleware.BrowserSessionMiddleware`). When a response
+    shows that the session expired, the session is harvested again and the
+    request is retried.
 
-#     - `browser` - type of the webdriver. Webdriver and the browser need to be
-#                 installed on the system. Default: `'chrome'`
+    Mixin uses following variables (in addition to those of
+    SeleniumSpiderMixin):
 
-#     - `browser_options` - list of strings or space-delimeted string options
-#                         passed to the webdriver. Default: `'--no-sandbox',
-#                         '--disable-dev-shm-usage'`
+    - `browser_session_url` - URL loaded in the browser to obtain the session.
+                            Default: `browser_cookies_url`
 
-#     - `browser_cookies` - Cookies to be uesd with Selenium requests.
-#                         Default: `None`
+    - `browser_session_expired_codes` - HTTP statuses of responses that
+                            mean the session expired. Default: `401, 403`
 
-#     - `browser_cookies_url` - URL used for getting session cookies.
-#                             Default: `None`
+    Override `session_headers` to turn harvested tokens into request headers,
+    and `is_session_expired` to detect expired sessions in other ways.
+    '''
 
-#     - `browser_loglevel` - Log level of webdriver instance.
+    browser_session_url = None
+    browser_session_expired_codes = [401, 403]
 
-#     - `bmp_proxy_path` - Path to the BrowserMob Proxy executable.
-#     '''
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.browser_session = None
+        self.browser_session_version = 0
 
-#     bmp_proxy_path = None
+    def refresh_browser_session(self):
+        '''
+        Harvest a new session in the browser. Blocking, so it should be
+        called from a worker thread.
+        '''
+        url = self.browser_session_url or self.browser_cookies_url
+        self.logger.debug('Obtaining browser session from "{}"'.format(url))
+        session = self.run_webdriver_tasks(tasks=[self.get_browser_session],
+                                           start_url=url)[0]
+        self.browser_session = session
+        self.browser_session_version += 1
+        return session
+
+    def get_browser_session(self, webdriver):
+        '''Webdriver task that collects the session from a loaded page'''
+        return {
+            'cookies': webdriver.get_cookies(),
+            'local_storage': webdriver.execute_script(
+                'return Object.assign({}, window.localStorage);') or {},
+            'user_agent': webdriver.execute_script(
+                'return navigator.userAgent;'),
+        }
+
+    def session_headers(self, session):
+        '''Headers added to HTTP requests made with the session'''
+        headers = {}
+        if session.get('user_agent'):
+            headers['User-Agent'] = session['user_agent']
+        return headers
+
+    def session_cookies(self, session):
+        '''Browser cookies converted to the format of Request cookies'''
+        return [
+            {k: c[k] for k in ('name', 'value', 'domain', 'path', 'secure')
+             if k in c}
+            for c in session.get('cookies', [])
+        ]
 
-#     def __init__(self, proxy_path=None, *args, **kwargs):
-#         super().__init__(*args, **kwargs)
+    def is_session_expired(self, response):
+        return response.status in self.browser_session_expired_codes
 
-#         self.logger.warning('BrowsermobSeleniumSpiderMixin is untested. '
-#                             'Things may break.')
 
-#         if proxy_path:
-#             self.bmp_proxy_path = proxy_path
-#         else:
-#             self.bmp_proxy_path = os.environ.get('BROWSERMOB_PROXY_PATH',
-#                                                  'browsermob-proxy')
+class NetworkCaptureSpiderMixin(SeleniumSpiderMixin):
+    '''
+    Mixin for capturing XHR / fetch responses made by pages in the browser.
 
-#         self.bmp_server = Server(self.bmp_proxy_path)
-#         self.bmp_server.start()
-#         self.bmp_proxy = self.bmp_server.create_proxy()
+    Instead of scraping the rendered DOM, spiders can use the JSON the page
+    got from the site's API. Responses are read from Chrome's performance log
+    and their bodies are fetched over Chrome DevTools Protocol, so only Chrome
+    is supported.
 
-#     @classmethod
-#     def from_crawler(cls, crawler, *args, **kwargs):
-#         spider = super().from_crawler(crawler, *args, **kwargs)
-#         crawler.signals.connect(spider.spider_closed,
-#                                 signal=signals.spider_closed)
-#         return spider
+    Load a page with `load_and_capture` (e.g. as a webdriver task), or render
+    a request with `meta={'render': {'capture': True}}` and read
+    `response.meta['captured_responses']`. Captured responses are dicts with
+    `url`, `status`, `mime_type`, `type`, `headers` and `body`.
 
-#     def spider_closed(self, spider):
-#         self.bmp_server.stop()
-#         self.webdriver.quit()
-#         spider.logger.info('Spider closed: %s', spider.name)
+    Mixin uses following variables (in addition to those of
+    SeleniumSpiderMixin):
 
-#     def _setup_webdriver(
-#         self,
-#         browser=None,
-#         browser_options=None,
-#         headless=True,
-#         loglevel=None
-#     ):
-#         '''
-#         Sets up a selenium webdriver which uses BrowserMob Proxy
-#         as a proxy
-#         '''
+    - `network_capture_types` - Resource types that are captured.
+                              Default: `'XHR', 'Fetch'`
 
-#         if browser.lower() not in ['firefox', 'chrome']:
-#             return super()._setup_webdriver(browser, browser_options,
-#                                             headless, loglevel)
+    - `network_capture_url_pattern` - Regex that captured URLs must match.
+                                    Default: `None` (all URLs)
+    '''
 
-#         brw_name = browser or self.browser
-#         brw_options = browser_options or self.browser_options
-#         loglvl = loglevel or self.browser_loglevel
+    network_capture_types = ['XHR', 'Fetch']
+    network_capture_url_pattern = None
 
-#         selenium_logger.setLevel(loglevel)
+    def load_and_capture(self, webdriver, url, wait=None):
+        '''
+        Webdriver task that loads `url` and returns responses captured while
+        the page was loading. `wait` is a function called with the webdriver
+        to wait for the page. By default waits until the network is idle.
+        '''
+        self.reset_capture(webdriver)
+        webdriver.get(url)
+        if wait is not None:
+            wait(webdriver)
+        else:
+            try:
+                BrowserWait(webdriver).until_network_idle()
+            except TimeoutException:
+                self.logger.debug('Network of "{}" not idle, capturing '
+                                  'responses loaded so far'.format(url))
+        return self.captured_responses(webdriver)
+
+    def reset_capture(self, webdriver):
+        '''Discard responses captured so far'''
+        webdriver.get_log('performance')
+
+    def captured_responses(self, webdriver):
+        '''Return responses captured since the last call'''
+        url_pattern = self.network_capture_url_pattern
+        if isinstance(url_pattern, str):
+            url_pattern = re.compile(url_pattern)
+
+        responses = {}
+        finished = set()
+        for entry in webdriver.get_log('performance'):
+            message = json.loads(entry['message'])['message']
+            params = message.get('params', {})
+            if message['method'] == 'Network.loadingFinished':
+                finished.add(params['requestId'])
+            elif message['method'] == 'Network.responseReceived':
+                response = params['response']
+                if params.get('type') not in self.network_capture_types:
+                    continue
+                if url_pattern and not url_pattern.search(response['url']):
+                    continue
+                responses[params['requestId']] = {
+                    'url': response['url'],
+                    'status': response['status'],
+                    'mime_type': response.get('mimeType'),
+                    'type': params['type'],
+                    'headers': response.get('headers', {}),
+                }
+
+        captured = []
+        for request_id, response in responses.items():
+            if request_id not in finished:
+                continue
+            try:
+                result = webdriver.execute_cdp_cmd(
+                    'Network.getResponseBody', {'requestId': request_id})
+            except Exception as e:
+                self.logger.debug('Failed to get body of "{}". Reason: {}'
+                                  .format(response['url'], e))
+                continue
+            body = result['body']
+            if result.get('base64Encoded'):
+                body = base64.b64decode(body)
+            captured.append({**response, 'body': body})
+        return captured
+
+    def iter_captured_json(self, captured):
+        '''Yield tuples (url, data) of captured responses with JSON body'''
+        for response in captured:
+            try:
+                yield response['url'], json.loads(response['body'])
+            except ValueError:
+                continue
 
-#         brw = self._get_webdriver_class(brw_name)
-#         opt = self._get_webdriver_options(brw)
-#         opt.headless = headless
-#         util.lmap(opt.add_argument, brw_options)
+    def _get_webdriver_options(self, browserclass):
+        opt = super()._get_webdriver_options(browserclass)
+        # Network events are recorded to the performance log
+        opt.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        return opt
 
-#         if brw_name.lower() == 'firefox':
-#             profile = webdriver.FirefoxProfile()
-#             profile.set_proxy(self.bmp_proxy.selenium_proxy())
-#             self.webdriver = brw.webdriver.WebDriver(
-#                 firefox_profile=profile, options=opt)
-#         elif brw_name.lower() == 'chrome':
-#             opt.add_argument("--proxy-server={0}".format(self.bmp_proxy.proxy))
-#             self.webdriver = brw.webdriver.WebDriver(chrome_options=opt)
-
-#         return self.webdriver
+    def _webdriver_pool_key(self):
+        return (*super()._webdriver_pool_key(), 'network_capture')
 
 
 class SubclassMixin():
@@ -0,0 +1,93 @@
+'''
+HTTP cache storage backends for Scrapy's HttpCacheMiddleware
+
+Scrapy HTTP cache docs: https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
+'''
+
+from pathlib import Path
+import time
+import zlib
+
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.project import data_path
+from w3lib.http import headers_dict_to_raw, headers_raw_to_dict
+
+import common.util as util
+
+
+class SqliteCacheStorage(object):
+    '''
+    Stores cached responses in a single SQLite file with zlib-compressed
+    bodies, instead of a directory tree per request as `FilesystemCacheStorage`
+    does.
+
+    Responses of all spiders are stored in `HTTPCACHE_DIR/cache.sqlite`,
+    keyed by spider name and request fingerprint.
+
+    Uses following settings in addition to the standard HTTPCACHE_* settings:
+
+    - `HTTPCACHE_SQLITE_COMPRESSION_LEVEL` - zlib level of stored bodies.
+                                             Default: `6`
+    '''
+
+    schema = '''
+        CREATE TABLE IF NOT EXISTS responses (
+            spider TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            url TEXT NOT NULL,
+            status INTEGER NOT NULL,
+            headers BLOB NOT NULL,
+            body BLOB NOT NULL,
+            timestamp REAL NOT NULL,
+            PRIMARY KEY (spider, fingerprint)
+        );
+    '''
+
+    def __init__(self, settings):
+        self.cachedir = data_path(settings['HTTPCACHE_DIR'], createdir=True)
+        self.expiration_secs = settings.getint('HTTPCACHE_EXPIRATION_SECS')
+        self.compression_level = settings.getint(
+            'HTTPCACHE_SQLITE_COMPRESSION_LEVEL', 6)
+        self.conn = None
+
+    def open_spider(self, spider):
+        path = Path(self.cachedir, 'cache.sqlite')
+        self.conn = util.sqlite_connect(path, self.schema)
+        self._fingerprinter = spider.crawler.request_fingerprinter
+        spider.logger.debug(f'Using SQLite cache storage in {path}')
+
+    def close_spider(self, spider):
+        self.conn.close()
+
+    def retrieve_response(self, spider, request):
+        row = self.conn.execute(
+            'SELECT url, status, headers, body, timestamp FROM responses '
+            'WHERE spider = ? AND fingerprint = ?',
+            (spider.name, self._fingerprint(request))).fetchone()
+        if row is None:
+            return None  # not cached
+
+        url, status, raw_headers, body, timestamp = row
+        if 0 < self.expiration_secs < time.time() - timestamp:
+            return None  # expired
+
+        request.meta['cache_timestamp'] = timestamp
+        headers = Headers(headers_raw_to_dict(raw_headers))
+        body = zlib.decompress(body)
+        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        return respcls(url=url, headers=headers, status=status, body=body)
+
+    def store_response(self, spider, request, response):
+        # Committed right away, so the write lock isn't held and other
+        # crawlers sharing the cache can write too
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (spider.name, self._fingerprint(request), response.url,
+                 response.status, headers_dict_to_raw(response.headers),
+                 zlib.compress(response.body, self.compression_level),
+                 time.time()))
+
+    def _fingerprint(self, request):
+        return self._fingerprinter.fingerprint(request).hex()
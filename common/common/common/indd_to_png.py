@@ -1,19 +1,26 @@
 import argparse
 from io import BytesIO
-import time
+import warnings
 
 from PIL import Image
+from selenium.common.exceptions import (NoSuchElementException,
+                                        NoSuchFrameException,
+                                        StaleElementReferenceException)
 import selenium.webdriver
 
+from common.components import BrowserWait
+
 
 FORMATS = ['pdf', 'png']
 OUTFILE_DEFAULT = 'convert_indd_export'
 WD_DEFAULT = 'chrome'
 WD_ARGS_DEFAULT = '--start-maximized'
-DELAY = 0.5
+TIMEOUT = 10
 
 
 def _get_indd_slide_url(wd):
+    # Leave frames entered by a previous failed attempt
+    wd.switch_to.default_content()
     wd.switch_to.frame(wd.find_element_by_name('targetFrame'))
     wd.switch_to.frame(wd.find_element_by_name('targetFrame0'))
     url = wd.execute_script('return location.href')
@@ -45,7 +52,7 @@ def _make_indd_slide_screenshot(wd):
 
 def convert_indd(url, format=FORMATS[0], outfile=OUTFILE_DEFAULT,
                  webdriver=WD_DEFAULT, webdriver_args=WD_ARGS_DEFAULT,
-                 delay=DELAY,
+                 timeout=TIMEOUT, delay=None,
                  slide_url_extractor=None, next_slide_loader=None,
                  last_slide_predicate=None, slide_screenshotter=None):
 
@@ -53,6 +60,14 @@ def convert_indd(url, format=FORMATS[0], outfile=OUTFILE_DEFAULT,
         raise ValueError('Output format must be one of {formats}.'.format(
             formats="'" + "', '".join(FORMATS) + "'"))
 
+    if delay is not None:
+        warnings.warn('`delay` is deprecated, slides are waited for until '
+                      'they load, at most `timeout` seconds',
+                      DeprecationWarning, stacklevel=2)
+        # Slides were given `delay` seconds to load, so they're waited for
+        # at least as long
+        timeout = max(timeout, delay)
+
     if slide_url_extractor is None:
         slide_url_extractor = _get_indd_slide_url
     if last_slide_predicate is None:
@@ -73,6 +88,9 @@ def convert_indd(url, format=FORMATS[0], outfile=OUTFILE_DEFAULT,
     for arg in webdriver_args.strip().split():
         options.add_argument(arg)
     with WebDriver(options=options) as wd:
+        wait = BrowserWait(wd, timeout, ignored_exceptions=(
+            NoSuchElementException, NoSuchFrameException,
+            StaleElementReferenceException))
         wd.get(url)
         slide_urls = []
         while True:
@@ -80,7 +98,9 @@ def convert_indd(url, format=FORMATS[0], outfile=OUTFILE_DEFAULT,
             if last_slide_predicate(wd):
                 break
             next_slide_loader(wd)
-            time.sleep(delay)
+            # Next slide is loaded once the URL of the slide changes
+            wait.until(lambda wd: slide_url_extractor(wd) != slide_urls[-1],
+                       message='Next slide did not load')
 
         imgs = []
         for url in slide_urls:
@@ -123,9 +143,11 @@ def main():
     parser.add_argument('-a', '--webdriver-args', default=WD_ARGS_DEFAULT,
                         help='Arguments passed to Webdriver. Default: '
                         "'{default}'".format(default=WD_ARGS_DEFAULT))
-    parser.add_argument('-d', '--delay', default=DELAY, type=float,
-                        help='Delay in seconds given to load a next slide. '
-                        "Default: {default}s".format(default=DELAY))
+    parser.add_argument('-t', '--timeout', default=TIMEOUT, type=float,
+                        help='Max time in seconds given to load a next slide. '
+                        "Default: {default}s".format(default=TIMEOUT))
+    parser.add_argument('-d', '--delay', type=float,
+                        help='Deprecated, use --timeout instead.')
 
     args = vars(parser.parse_args())
     convert_indd(**args)
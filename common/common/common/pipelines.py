@@ -16,14 +16,22 @@ class CsvWriterPipeline(object):
             spider.logger.critical(
                 "Data cannot be saved, 'data' is not a directory.")
         data_dir.mkdir(exist_ok=True)
-        self.file = data_dir.joinpath(
-            f'{spider.name}__{timestamp}.csv').open('w', newline='')
+        self.path = data_dir.joinpath(f'{spider.name}__{timestamp}.csv')
+        self.file = self.path.open('w', newline='')
         # if python < 3 use
         #self.file = open('mietwohnungen.csv', 'wb')
         self.items = []
         self.colnames = []
 
     def close_spider(self, spider):
+        if getattr(spider, 'listing_unchanged', False) and not self.items:
+            # Output of the last run is still up to date, an empty file would
+            # replace it as the latest output
+            self.file.close()
+            self.path.unlink()
+            spider.logger.info('Listing unchanged, no output written')
+            return
+
         csvWriter = csv.DictWriter(
             self.file, fieldnames=self.colnames)  # , delimiter=',')
         spider.logger.info("HEADER: " + str(self.colnames))
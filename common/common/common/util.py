@@ -1,16 +1,20 @@
 import unicodedata
 from datetime import datetime
+import fnmatch
 import functools
 from http import cookies
 import inspect
 import importlib
 import itertools
+import json
 from pathlib import Path
 import re
+import sqlite3
 from urllib import parse
 import tempfile
 
 import requests
+from w3lib.url import canonicalize_url
 
 
 
@@ -131,6 +135,67 @@ def string_combinations(
                 yield res
 
 
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def iter_json_members(text, stream=None):
+    '''
+    Incrementally decode a JSON object, yielding `(key, value)` pairs of its
+    top-level members in the order they appear in `text`.
+
+    Arrays stored under keys listed in `stream` are not decoded as a whole.
+    Instead, each of their elements is yielded as a separate `(key, element)`
+    pair as soon as it is decoded, so only a single element is held in memory
+    at a time.
+
+    EXAMPLE:
+    >>> text = '{"message": [], "list": [{"id": 1}, {"id": 2}]}'
+    >>> list(iter_json_members(text, stream=['list']))
+    [('message', []), ('list', {'id': 1}), ('list', {'id': 2})]
+    '''
+
+    stream = set(stream or [])
+    decoder = json.JSONDecoder()
+
+    def skip_ws(idx):
+        return _JSON_WHITESPACE.match(text, idx).end()
+
+    def expect(idx, chars):
+        idx = skip_ws(idx)
+        if idx >= len(text) or text[idx] not in chars:
+            raise json.JSONDecodeError(
+                'Expecting one of {!r}'.format(chars), text, idx)
+        return text[idx], idx + 1
+
+    _, idx = expect(0, '{')
+    if text[skip_ws(idx):skip_ws(idx) + 1] == '}':
+        return
+
+    while True:
+        key, idx = decoder.raw_decode(text, skip_ws(idx))
+        _, idx = expect(idx, ':')
+        idx = skip_ws(idx)
+
+        if key in stream and text[idx:idx + 1] == '[':
+            idx = skip_ws(idx + 1)
+            if text[idx:idx + 1] == ']':
+                idx += 1
+            else:
+                while True:
+                    value, idx = decoder.raw_decode(text, skip_ws(idx))
+                    yield key, value
+                    char, idx = expect(idx, ',]')
+                    if char == ']':
+                        break
+        else:
+            value, idx = decoder.raw_decode(text, idx)
+            yield key, value
+
+        char, idx = expect(idx, ',}')
+        if char == '}':
+            return
+
+
 def map_dict_val(fn, d):
     return {
         k: fn(v)
@@ -164,6 +229,76 @@ def pack_url(url_obj, q_obj):
     return url_string
 
 
+# Query parameters signing or tying the URL to one page (e.g. TYPO3 `cHash`),
+# URLs of other pages cannot be guessed when they're present
+SIGNED_QUERY_PARAMS = ['chash', '*token*', '*signature*', 'sig', '*hmac*',
+                       '*nonce*']
+
+
+def page_url_template(url, page, previous_url=None,
+                      signed_params=SIGNED_QUERY_PARAMS):
+    '''
+    Split `url` around the last occurence of the page number `page` as
+    a whole path segment or query parameter value.
+
+    Returns tuple `(prefix, suffix)` such that URL of any other page can be
+    formed as `f'{prefix}{n}{suffix}'`, or `None` if the page number is not
+    found in the URL.
+
+    `None` is also returned if the URL contains a query parameter matching
+    any of the `signed_params` patterns (case-insensitive), or if
+    `previous_url` (URL of the preceding page) is given and any query
+    parameter other than the page number has a different value in it, as
+    such parameters cannot be guessed for the other pages.
+
+    EXAMPLE:
+    >>> page_url_template('https://example.com/events/page/2/?tag=2020', 2)
+    ('https://example.com/events/page/', '/?tag=2020')
+    '''
+
+    # Digits inside hashes, IDs or percent-escapes are not page numbers
+    matches = list(re.finditer(r'(?<=[/=]){}(?=[/&?#]|$)'.format(page), url))
+    if not matches:
+        return None
+
+    query = parse.parse_qs(parse.urlparse(url).query, keep_blank_values=True)
+    if any(fnmatch.fnmatchcase(key.lower(), p)
+           for key in query for p in signed_params):
+        return None
+    if previous_url is not None:
+        previous_query = parse.parse_qs(parse.urlparse(previous_url).query,
+                                        keep_blank_values=True)
+        for key, values in query.items():
+            if values == [str(page)] or key not in previous_query:
+                continue
+            if previous_query[key] != values:
+                return None
+
+    match = matches[-1]
+    return url[:match.start()], url[match.end():]
+
+
+def canonical_url(url, ignore_params=None):
+    '''
+    Normalize `url` so that URLs of the same page compare equal.
+
+    Query parameters are sorted and the fragment is dropped (see
+    `w3lib.url.canonicalize_url`). Query parameters whose names match any of
+    the `ignore_params` patterns (e.g. `'utm_*'`, or `'*'` to drop the whole
+    query) are removed.
+    '''
+
+    url_obj = parse.urlparse(canonicalize_url(url))
+    if ignore_params:
+        query = [
+            (key, val) for key, val
+            in parse.parse_qsl(url_obj.query, keep_blank_values=True)
+            if not any(fnmatch.fnmatchcase(key, p) for p in ignore_params)
+        ]
+        url_obj = url_obj._replace(query=parse.urlencode(query))
+    return parse.urlunparse(url_obj)
+
+
 def xpath_class(classes, operator="or"):
     ''''Format an XPath class condition'''
 
@@ -335,6 +470,26 @@ def time_tag():
     return datetime.now().strftime('%Y_%m_%d__%H_%M_%S')
 
 
+def sqlite_connect(path, schema=None):
+    '''
+    Open SQLite database at `path`, creating the parent directories and
+    the database if they don't exist.
+
+    `schema` is an SQL script executed on connect, e.g. `CREATE TABLE IF NOT
+    EXISTS ...` statements.
+    '''
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    # Crawlers sharing the database wait for each other's writes
+    conn = sqlite3.connect(str(path), timeout=30)
+    # WAL lets multiple crawls read the database while one writes into it
+    conn.execute('PRAGMA journal_mode=WAL')
+    if schema:
+        conn.executescript(schema)
+        conn.commit()
+    return conn
+
+
 def update_request_cookies(request, inplace=True, pattern=None):
     c = cookies.SimpleCookie()
     h = request.headers.copy() if not inplace else request.headers
@@ -13,7 +13,6 @@ def readme():
 
 
 install_requires = [
-    'browsermob-proxy==0.8.0',
     'scrapy>=1.5.0',
     'selenium==3.141.0',
     'six>=1.4.1',
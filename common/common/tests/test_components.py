@@ -0,0 +1,141 @@
+import threading
+import time
+import unittest
+
+from common.components import SeleniumSpiderMixin, WebdriverPool
+
+
+class FakeWebdriver(object):
+    '''Records calls made by webdriver tasks'''
+
+    def __init__(self):
+        self.url = None
+        self.cookies = []
+        self.crashed = False
+        self.quit_called = False
+
+    @property
+    def current_url(self):
+        if self.crashed:
+            raise RuntimeError('Webdriver crashed')
+        return self.url
+
+    def get(self, url):
+        self.url = url
+
+    def add_cookie(self, cookie):
+        self.cookies.append(cookie)
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakeSeleniumSpider(SeleniumSpiderMixin):
+    name = 'fake_selenium'
+
+    def _create_webdriver(self, *args, **kwargs):
+        return FakeWebdriver()
+
+    def _webdriver_pool_key(self):
+        # Every spider gets its own pool
+        return id(self)
+
+
+class WebdriverPoolTest(unittest.TestCase):
+
+    def test_idle_webdrivers_are_shut_down(self):
+        pool = WebdriverPool(FakeWebdriver, idle_timeout=0.1)
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        time.sleep(0.05)
+        pool.release(second)
+        time.sleep(0.08)
+        self.assertTrue(first.quit_called)
+        self.assertFalse(second.quit_called)
+        time.sleep(0.1)
+        self.assertTrue(second.quit_called)
+        self.assertEqual(pool._idle, [])
+        pool.close()
+
+    def test_borrowed_webdrivers_are_not_shut_down(self):
+        pool = WebdriverPool(FakeWebdriver, idle_timeout=0.05)
+        driver = pool.acquire()
+        pool.release(driver)
+        driver = pool.acquire()
+        time.sleep(0.1)
+        self.assertFalse(driver.quit_called)
+        pool.release(driver)
+        pool.close()
+        self.assertTrue(driver.quit_called)
+
+
+class RunWebdriverTasksParallelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.spider = FakeSeleniumSpider(browser_idle_timeout=0)
+
+    def tearDown(self):
+        self.spider._close_webdriver_pool()
+
+    def test_results_in_order_of_tasks(self):
+        def task(n):
+            def run(wd):
+                # Later tasks finish first
+                time.sleep(0.01 * (5 - n))
+                return n
+            return run
+
+        results = self.spider.run_webdriver_tasks(
+            tasks=[task(n) for n in range(5)], parallel=True)
+        self.assertEqual(results, [0, 1, 2, 3, 4])
+
+    def test_tasks_run_concurrently_on_pooled_webdrivers(self):
+        barrier = threading.Barrier(2, timeout=5)
+        drivers = []
+
+        def task(wd):
+            drivers.append(wd)
+            # Fails with BrokenBarrierError if the tasks run one by one
+            barrier.wait()
+            return wd
+
+        self.spider.run_webdriver_tasks(tasks=[task, task], parallel=True,
+                                        max_workers=2)
+        self.assertEqual(len({id(wd) for wd in drivers}), 2)
+        pool = self.spider.webdriver_pool
+        self.assertEqual(len(pool._idle), 2)
+
+    def test_cookies_and_start_url_applied_per_webdriver(self):
+        barrier = threading.Barrier(2, timeout=5)
+        cookies = [{'name': 'session', 'value': 'abc'}]
+
+        def task(wd):
+            barrier.wait()
+            return wd.current_url, list(wd.cookies)
+
+        results = self.spider.run_webdriver_tasks(
+            tasks=[task] * 2, cookies=cookies,
+            start_url='https://example.com/', parallel=True, max_workers=2)
+        self.assertEqual(results, [('https://example.com/', cookies)] * 2)
+
+    def test_crashed_webdriver_is_replaced(self):
+        drivers = []
+
+        def task(wd):
+            drivers.append(wd)
+            wd.crashed = True
+            raise RuntimeError('Task failed')
+
+        with self.assertRaises(RuntimeError):
+            self.spider.run_webdriver_tasks(tasks=[task], parallel=True)
+        self.assertTrue(drivers[0].quit_called)
+        self.assertEqual(self.spider.webdriver_pool._idle, [])
+
+    def test_webdriver_not_accepted(self):
+        with self.assertRaises(ValueError):
+            self.spider.run_webdriver_tasks(FakeWebdriver(), tasks=[],
+                                            parallel=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,248 @@
+'''
+Command for running all event spiders in a single run
+'''
+
+from collections import defaultdict
+import json
+import logging
+import multiprocessing
+from pathlib import Path
+import re
+
+from scrapy.commands.crawl import Command as CrawlCommand
+from scrapy.crawler import CrawlerProcess
+from scrapy.exceptions import UsageError
+from scrapy.settings import SETTINGS_PRIORITIES
+from scrapy.utils.conf import build_component_list
+from scrapy.utils.misc import load_object
+from scrapy.utils.project import get_project_settings
+
+import common.util as cutil
+
+from event.spider_middleware import StartRequestShardMiddleware
+import event.util as util
+
+
+logger = logging.getLogger(__name__)
+
+
+def run_jobs(process, jobs, time_tag, concurrency, spargs):
+    '''
+    Run crawl jobs `(spider name, shard index, shard count)` concurrently in
+    `process`. Returns stats of each job.
+    '''
+
+    crawlers = []
+    for name, shard, shards in jobs:
+        crawler = process.create_crawler(name)
+        crawler.settings.set('CONCURRENT_REQUESTS', concurrency,
+                             priority='cmdline')
+        tag = time_tag
+        if shards > 1:
+            crawler.settings.set('SHARD_INDEX', shard, priority='cmdline')
+            crawler.settings.set('SHARD_COUNT', shards, priority='cmdline')
+            tag = f'{time_tag}__shard{shard}'
+        process.crawl(crawler, _time_tag=tag, **spargs)
+        crawlers.append((name, crawler))
+    process.start()
+    return [(name, crawler.stats.get_stats()) for name, crawler in crawlers]
+
+
+def _run_worker(jobs, settings, time_tag, concurrency, spargs):
+    '''Run crawl jobs in a worker process with its own reactor'''
+
+    project_settings = get_project_settings()
+    project_settings.setdict(settings, priority='cmdline')
+    process = CrawlerProcess(project_settings)
+    stats = run_jobs(process, jobs, time_tag, concurrency, spargs)
+    # Stats values must be picklable to be passed back to the main process
+    return [(name, json.loads(json.dumps(job_stats, default=str)))
+            for name, job_stats in stats]
+
+
+class Command(CrawlCommand):
+    '''
+    Run all spiders of the project (or those given as arguments) concurrently.
+
+    `CONCURRENT_REQUESTS` is the budget of the whole run, split evenly between
+    the crawls. Each spider writes its own CSV. All CSVs share the same time
+    tag and are merged into `data/<name>__<time tag>.csv` once all spiders
+    finish, together with their stats. Spiders closed because their listing
+    did not change write no CSV, so the latest earlier CSV of such spider is
+    merged instead, and listed in its stats under `crawlall/previous_output`.
+
+    With `--processes N`, spiders are distributed across N worker processes,
+    each with its own reactor. With `--shards K`, start requests of each
+    spider are split into K shards crawled as separate jobs. Spiders that
+    don't run `StartRequestShardMiddleware` are not sharded, as each shard
+    would crawl all of their start requests.
+    '''
+
+    def syntax(self):
+        return '[options] [spider ...]'
+
+    def short_desc(self):
+        return 'Run all spiders concurrently'
+
+    def add_options(self, parser):
+        super().add_options(parser)
+        parser.add_argument('-x', '--exclude', action='append', default=[],
+                            metavar='SPIDER',
+                            help='skip spider (may be repeated)')
+        parser.add_argument('--merged-name', default='all_events',
+                            metavar='NAME',
+                            help='name of the merged CSV file '
+                                 '(default: all_events)')
+        parser.add_argument('-p', '--processes', type=int, default=1,
+                            metavar='N',
+                            help='number of worker processes (default: 1)')
+        parser.add_argument('--shards', type=int, default=1, metavar='K',
+                            help='split start requests of each spider into K '
+                                 'shards (default: 1)')
+
+    def run(self, args, opts):
+        spider_loader = self.crawler_process.spider_loader
+        names = args or sorted(spider_loader.list())
+        unknown = set(names) - set(spider_loader.list())
+        if unknown:
+            raise UsageError(f'Unknown spiders: {", ".join(sorted(unknown))}')
+        names = [name for name in names if name not in opts.exclude]
+        if not names:
+            raise UsageError('No spiders to run')
+        if opts.processes < 1 or opts.shards < 1:
+            raise UsageError('--processes and --shards must be at least 1')
+
+        jobs = []
+        for name in names:
+            shards = self._shard_count(name, opts.shards)
+            jobs.extend((name, shard, shards) for shard in range(shards))
+        budget = self.settings.getint('CONCURRENT_REQUESTS')
+        concurrency = max(1, budget // len(jobs))
+        time_tag = cutil.time_tag()
+
+        if opts.processes == 1:
+            stats = run_jobs(self.crawler_process, jobs, time_tag,
+                             concurrency, opts.spargs)
+            if self.crawler_process.bootstrap_failed:
+                self.exitcode = 1
+        else:
+            stats = self._run_in_processes(jobs, opts.processes, time_tag,
+                                           concurrency, opts.spargs)
+
+        unchanged = {name for name, job_stats in stats
+                     if job_stats.get('finish_reason') == 'listing_unchanged'}
+        previous = self._merge_outputs(names, time_tag, opts.merged_name,
+                                       unchanged)
+        self._merge_stats(stats, time_tag, opts.merged_name, previous)
+
+    def _shard_count(self, name, shards):
+        '''Number of shards the spider `name` can be split into'''
+
+        if shards == 1:
+            return 1
+        spidercls = self.crawler_process.spider_loader.load(name)
+        settings = self.settings.copy()
+        spidercls.update_settings(settings)
+        middlewares = build_component_list(
+            settings.getwithbase('SPIDER_MIDDLEWARES'))
+        if not any(issubclass(load_object(mw), StartRequestShardMiddleware)
+                   for mw in middlewares):
+            logger.warning('Spider "{}" does not run '
+                                'StartRequestShardMiddleware, crawling it '
+                                'in a single shard'.format(name))
+            return 1
+        return shards
+
+    def _run_in_processes(self, jobs, processes, time_tag, concurrency, spargs):
+        # Only settings given on the command line are passed, workers load
+        # project settings themselves
+        values = self.settings.copy_to_dict()
+        settings = {
+            name: values[name] for name in values
+            if self.settings.getpriority(name) >= SETTINGS_PRIORITIES['cmdline']
+        }
+        processes = min(processes, len(jobs))
+        batches = [jobs[i::processes] for i in range(processes)]
+
+        # Reactors cannot be shared with forked processes
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(processes, maxtasksperchild=1) as pool:
+            results = pool.starmap(_run_worker, [
+                (batch, settings, time_tag, concurrency, spargs)
+                for batch in batches
+            ])
+        return [job_stats for result in results for job_stats in result]
+
+    def _merge_outputs(self, names, time_tag, merged_name, unchanged=()):
+        '''
+        Merge CSVs of spiders `names` written in run `time_tag`. Spiders in
+        `unchanged` that wrote no CSV are merged with their latest earlier
+        CSV. Returns paths of the earlier CSVs by spider name.
+        '''
+
+        outputs = []
+        previous = {}
+        for name in names:
+            paths = [
+                path for path in sorted(
+                    Path('data').glob(f'{name}__{time_tag}*.csv'))
+                if path.stat().st_size
+            ]
+            if not paths and name in unchanged:
+                paths = previous[name] = self._previous_outputs(name,
+                                                                time_tag)
+                if paths:
+                    logger.info('Listing of spider "{}" did not change, '
+                                'merging its previous output {}'.format(
+                                    name, ', '.join(map(str, paths))))
+                else:
+                    logger.warning('Listing of spider "{}" did not change, '
+                                   'but no previous output was found'
+                                   .format(name))
+            outputs.extend(paths)
+        if outputs:
+            util.merge_csvs(outputs,
+                            Path('data', f'{merged_name}__{time_tag}.csv'))
+        return previous
+
+    def _previous_outputs(self, name, time_tag):
+        '''CSVs of spider `name` from the latest run before `time_tag`'''
+
+        pattern = re.compile(r'{}__(\d{{4}}(?:_\d\d){{2}}__\d\d(?:_\d\d){{2}})'
+                             r'(?:__shard\d+)?\.csv'.format(re.escape(name)))
+        runs = defaultdict(list)
+        for path in Path('data').glob(f'{name}__*.csv'):
+            match = pattern.fullmatch(path.name)
+            if match and match.group(1) < time_tag and path.stat().st_size:
+                runs[match.group(1)].append(path)
+        if not runs:
+            return []
+        return sorted(runs[max(runs)])
+
+    def _merge_stats(self, stats, time_tag, merged_name, previous=None):
+        '''
+        Merge stats of all jobs of a spider. Counts are summed, memory usage
+        and elapsed time take the highest value. Earlier CSVs merged instead
+        of the output of a spider (see `_merge_outputs`) are listed under
+        `crawlall/previous_output`.
+        '''
+
+        merged = defaultdict(dict)
+        for name, job_stats in stats:
+            for key, value in job_stats.items():
+                prev = merged[name].get(key)
+                if not isinstance(value, (int, float)) or \
+                        not isinstance(prev, (int, float)):
+                    merged[name].setdefault(key, value)
+                elif key.startswith('memusage/') or \
+                        key == 'elapsed_time_seconds':
+                    merged[name][key] = max(prev, value)
+                else:
+                    merged[name][key] = prev + value
+
+        for name, paths in (previous or {}).items():
+            merged[name]['crawlall/previous_output'] = [str(p) for p in paths]
+
+        path = Path('data', f'{merged_name}__{time_tag}__stats.json')
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(json.dumps(merged, indent=2, default=str))
@@ -0,0 +1,48 @@
+'''
+Command for re-running a spider and its pipelines from the HTTP cache
+'''
+
+from scrapy.commands.crawl import Command as CrawlCommand
+
+
+class Command(CrawlCommand):
+    '''
+    Run a spider entirely from the HTTP cache, without touching the network.
+
+    Responses must have been cached by a previous crawl with the HTTP cache
+    enabled (`scrapy crawl <spider> -s HTTPCACHE_ENABLED=1`). Requests missing
+    in the cache are ignored. Intended for iterating on pipelines.
+
+    Pages that the recorded crawl revalidated (`304 Not Modified`) are served
+    from the conditional GET store (`CONDITIONALGET_PATH`), so it must be kept
+    along with the cache.
+    '''
+
+    # Settings applied on top of the project and spider settings
+    replay_settings = {
+        'HTTPCACHE_ENABLED': True,
+        'HTTPCACHE_IGNORE_MISSING': True,
+        'HTTPCACHE_EXPIRATION_SECS': 0,
+        'HTTPCACHE_POLICY': 'scrapy.extensions.httpcache.DummyPolicy',
+        # Nothing is downloaded, so there's nothing to throttle
+        'AUTOTHROTTLE_ENABLED': False,
+        'DOWNLOAD_DELAY': 0,
+        'CONCURRENT_REQUESTS': 64,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': 64,
+        'ROBOTSTXT_OBEY': False,
+        # Stores of previous runs would skip cached pages
+        'SEENSTORE_ENABLED': False,
+        # ConditionalGetMiddleware is kept enabled. It's below the cache, so
+        # revalidated pages are cached as 304s, and it serves their bodies
+        'CONDITIONALGET_ENABLED': True,
+        'CHANGEDETECTION_ENABLED': False,
+        'ADAPTIVECONCURRENCY_ENABLED': False,
+        'DNSCACHE_PERSIST_ENABLED': False,
+    }
+
+    def short_desc(self):
+        return 'Run a spider and its pipelines from the HTTP cache only'
+
+    def process_options(self, args, opts):
+        super().process_options(args, opts)
+        self.settings.setdict(self.replay_settings, priority='cmdline')
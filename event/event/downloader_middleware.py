@@ -6,10 +6,29 @@ Scrapy downloader middleware docs: https://docs.scrapy.org/en/latest/topics/down
 '''
 
 
+import base64
 import csv
+from datetime import datetime
 import io
+import json
+import time
+import zlib
 
 from scrapy import signals
+from scrapy.downloadermiddlewares.robotstxt import RobotsTxtMiddleware
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.http import HtmlResponse
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.defer import maybe_deferred_to_future
+from scrapy.utils.httpobj import urlparse_cached
+from scrapy.utils.misc import build_from_crawler
+from selenium.common.exceptions import TimeoutException
+from twisted.internet import defer, threads
+from twisted.python.failure import Failure
+from twisted.python.threadpool import ThreadPool
+
+from common.components import BrowserWait
+import common.util as util
 
 from event.items import ResponseItem
 
@@ -79,3 +98,856 @@ class OutputCSVParserMiddleware(object):
             new_results.extend(reader)
 
         return new_results
+
+
+class SeenStoreMiddleware(object):
+    '''
+    Skips event detail pages already scraped in previous runs.
+
+    Fingerprints of downloaded detail pages are recorded in an SQLite database
+    at `SEENSTORE_PATH`, per spider. Detail pages recorded less than
+    `SEENSTORE_TTL` seconds ago are not requested again, so each run yields
+    only new events and those due for re-check. TTL of `0` means the pages are
+    never re-checked.
+
+    Detail pages are GET requests whose callback is named in
+    `SEENSTORE_CALLBACKS` (default `parse_entry`). Requests can be included
+    or excluded explicitly with `request.meta['seen_store']`.
+
+    Enabled with `SEENSTORE_ENABLED` setting.
+    '''
+
+    schema = '''
+        CREATE TABLE IF NOT EXISTS seen (
+            spider TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            url TEXT NOT NULL,
+            seen_at REAL NOT NULL,
+            PRIMARY KEY (spider, fingerprint)
+        );
+    '''
+
+    def __init__(self, path, ttl=0, callbacks=None, fingerprinter=None,
+                 stats=None):
+        self.path = path
+        self.ttl = ttl
+        self.callbacks = set(callbacks or [])
+        self.fingerprinter = fingerprinter
+        self.stats = stats
+        self.conn = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('SEENSTORE_ENABLED'):
+            raise NotConfigured
+        mw = cls(
+            path=settings.get('SEENSTORE_PATH', 'data/seen.sqlite'),
+            ttl=settings.getfloat('SEENSTORE_TTL', 0),
+            callbacks=settings.getlist('SEENSTORE_CALLBACKS', ['parse_entry']),
+            fingerprinter=crawler.request_fingerprinter,
+            stats=crawler.stats,
+        )
+        crawler.signals.connect(mw.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(mw.spider_closed, signal=signals.spider_closed)
+        return mw
+
+    def spider_opened(self, spider):
+        self.conn = util.sqlite_connect(self.path, self.schema)
+
+    def spider_closed(self, spider):
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
+
+    def process_request(self, request, spider):
+        if not self.is_tracked(request):
+            return None
+
+        row = self.conn.execute(
+            'SELECT seen_at FROM seen WHERE spider = ? AND fingerprint = ?',
+            (spider.name, self.fingerprint(request))).fetchone()
+        if row is None:
+            return None
+        if self.ttl and time.time() - row[0] >= self.ttl:
+            self._inc_stats('seenstore/rechecked', spider)
+            return None
+
+        self._inc_stats('seenstore/skipped', spider)
+        raise IgnoreRequest(f'Already scraped: {request.url}')
+
+    def process_response(self, request, response, spider):
+        if response.status == 200 and self.is_tracked(request):
+            # Committed right away, so the write lock isn't held and other
+            # crawlers sharing the database can write too
+            with self.conn:
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO seen VALUES (?, ?, ?, ?)',
+                    (spider.name, self.fingerprint(request), request.url,
+                     time.time()))
+            self._inc_stats('seenstore/stored', spider)
+        return response
+
+    def is_tracked(self, request):
+        tracked = request.meta.get('seen_store')
+        if tracked is not None:
+            return tracked
+        callback = getattr(request.callback, '__name__', None)
+        return request.method == 'GET' and callback in self.callbacks
+
+    def fingerprint(self, request):
+        return self.fingerprinter.fingerprint(request).hex()
+
+    def _inc_stats(self, key, spider):
+        if self.stats is not None:
+            self.stats.inc_value(key, spider=spider)
+
+
+class PersistentRobotsTxtMiddleware(RobotsTxtMiddleware):
+    '''
+    RobotsTxtMiddleware that reuses robots.txt files fetched in previous runs.
+
+    Bodies of downloaded robots.txt files are stored per domain in an SQLite
+    database at `ROBOTSTXT_CACHE_PATH`, shared by all spiders. Files stored
+    less than `ROBOTSTXT_CACHE_TTL` seconds ago are parsed from the database
+    instead of being requested again. Server errors (5xx) are not stored.
+
+    Enabled if both `ROBOTSTXT_OBEY` and `ROBOTSTXT_CACHE_ENABLED` are set,
+    otherwise behaves as the default RobotsTxtMiddleware.
+    '''
+
+    schema = '''
+        CREATE TABLE IF NOT EXISTS robotstxt (
+            netloc TEXT PRIMARY KEY,
+            body BLOB NOT NULL,
+            fetched_at REAL NOT NULL
+        );
+    '''
+
+    def __init__(self, crawler):
+        super().__init__(crawler)
+        settings = crawler.settings
+        self.cache_enabled = settings.getbool('ROBOTSTXT_CACHE_ENABLED')
+        self.path = settings.get('ROBOTSTXT_CACHE_PATH',
+                                 'data/netcache.sqlite')
+        self.ttl = settings.getfloat('ROBOTSTXT_CACHE_TTL', 24 * 60 * 60)
+        self.conn = None
+        if self.cache_enabled:
+            crawler.signals.connect(self.spider_closed,
+                                    signal=signals.spider_closed)
+
+    def spider_closed(self, spider):
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
+
+    def robot_parser(self, request, *args, **kwargs):
+        netloc = urlparse_cached(request).netloc
+        if self.cache_enabled and netloc not in self._parsers:
+            body = self.load(netloc)
+            if body is not None:
+                self._parsers[netloc] = build_from_crawler(
+                    self._parserimpl, self.crawler, body)
+                self._stats.inc_value('robotstxt/cache_hit')
+        return super().robot_parser(request, *args, **kwargs)
+
+    def _parse_robots(self, response, netloc, *args, **kwargs):
+        if self.cache_enabled and response.status < 500:
+            self.store(netloc, response.body)
+        return super()._parse_robots(response, netloc, *args, **kwargs)
+
+    def load(self, netloc):
+        row = self.connection().execute(
+            'SELECT body, fetched_at FROM robotstxt WHERE netloc = ?',
+            (netloc,)).fetchone()
+        if row is None or time.time() - row[1] >= self.ttl:
+            return None
+        return row[0]
+
+    def store(self, netloc, body):
+        conn = self.connection()
+        conn.execute('INSERT OR REPLACE INTO robotstxt VALUES (?, ?, ?)',
+                     (netloc, body, time.time()))
+        conn.commit()
+
+    def connection(self):
+        if self.conn is None:
+            self.conn = util.sqlite_connect(self.path, self.schema)
+        return self.conn
+
+
+class BrowserSessionMiddleware(object):
+    '''
+    Downloads requests of spiders using `common.components.BrowserSessionMixin`
+    over plain HTTP with the session obtained in the browser.
+
+    The session is obtained (in a worker thread) before the first request.
+    Its headers are set on every request, its cookies are passed to the
+    cookie jar with the first request to their domain. If the spider finds
+    a response expired (`spider.is_session_expired`), the session is obtained
+    again and the request is retried, at most `BROWSERSESSION_MAX_RETRIES`
+    times.
+
+    Requests can opt out with `request.meta['browser_session'] = False`.
+    Must be above CookiesMiddleware (300), so the cookies reach the jar.
+    '''
+
+    def __init__(self, max_retries=1, stats=None):
+        self.max_retries = max_retries
+        self.stats = stats
+        self.version = 0
+        self.headers = {}
+        self.pending_cookies = []
+        self.waiters = []
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            max_retries=crawler.settings.getint('BROWSERSESSION_MAX_RETRIES', 1),
+            stats=crawler.stats,
+        )
+
+    async def process_request(self, request, spider):
+        if not self.is_enabled(request, spider):
+            return None
+        if spider.browser_session is None:
+            await self.refresh(spider)
+        self.apply_session(request, spider)
+        return None
+
+    async def process_response(self, request, response, spider):
+        if not self.is_enabled(request, spider) \
+                or not spider.is_session_expired(response):
+            return response
+        retries = request.meta.get('browser_session_retries', 0)
+        if retries >= self.max_retries:
+            return response
+
+        # Requests sent with an older session wait only for the new one
+        if request.meta.get('browser_session_version') \
+                == spider.browser_session_version:
+            spider.logger.debug('Browser session expired, obtaining a new '
+                                'one')
+            await self.refresh(spider)
+
+        self._inc_stats('browsersession/retried', spider)
+        # Cookies of the old session must not overwrite the new ones
+        cookies = request.meta.get('browser_session_own_cookies',
+                                   request.cookies)
+        retry = request.replace(cookies=cookies, dont_filter=True)
+        retry.meta['browser_session_retries'] = retries + 1
+        return retry
+
+    def is_enabled(self, request, spider):
+        return hasattr(spider, 'refresh_browser_session') \
+            and request.meta.get('browser_session', True)
+
+    async def refresh(self, spider):
+        waiter = defer.Deferred()
+        self.waiters.append(waiter)
+        if len(self.waiters) == 1:
+            d = threads.deferToThread(spider.refresh_browser_session)
+            d.addBoth(self._refreshed)
+            self._inc_stats('browsersession/refreshed', spider)
+        await maybe_deferred_to_future(waiter)
+
+    def apply_session(self, request, spider):
+        if self.version != spider.browser_session_version:
+            session = spider.browser_session
+            self.version = spider.browser_session_version
+            self.headers = spider.session_headers(session)
+            self.pending_cookies = spider.session_cookies(session)
+
+        for name, value in self.headers.items():
+            request.headers.setdefault(name, value)
+        request.meta['browser_session_version'] = self.version
+
+        host = urlparse_cached(request).hostname or ''
+        cookies = [c for c in self.pending_cookies
+                   if self._domain_match(host, c.get('domain'))]
+        if not cookies:
+            return
+        self.pending_cookies = [c for c in self.pending_cookies
+                                if c not in cookies]
+        own_cookies = request.cookies
+        if isinstance(own_cookies, dict):
+            own_cookies = [{'name': k, 'value': v}
+                           for k, v in own_cookies.items()]
+        request.meta['browser_session_own_cookies'] = request.cookies
+        request.cookies = [*own_cookies, *cookies]
+
+    def _refreshed(self, result):
+        waiters, self.waiters = self.waiters, []
+        for waiter in waiters:
+            if isinstance(result, Failure):
+                waiter.errback(result)
+            else:
+                waiter.callback(None)
+
+    def _domain_match(self, host, domain):
+        if not domain:
+            return True
+        domain = domain.lstrip('.')
+        return host == domain or host.endswith(f'.{domain}')
+
+    def _inc_stats(self, key, spider):
+        if self.stats is not None:
+            self.stats.inc_value(key, spider=spider)
+
+
+class ConditionalGetMiddleware(object):
+    '''
+    Revalidates pages downloaded in previous runs instead of re-downloading
+    them.
+
+    `ETag` and `Last-Modified` validators of GET responses are stored with
+    the response body in an SQLite database at `CONDITIONALGET_PATH`. Later
+    requests for the same page are sent with `If-None-Match` and
+    `If-Modified-Since` headers. If the server answers `304 Not Modified`,
+    the stored body is served as the response (flagged `revalidated`).
+    If `CONDITIONALGET_STORE_BODY` is disabled, bodies are not stored and
+    unmodified pages are skipped instead. Pages not downloaded or
+    revalidated for `CONDITIONALGET_TTL` seconds are evicted when a spider opens (`0` keeps
+    them forever).
+
+    If `CONDITIONALGET_LISTINGS_ONLY` is set, only listing pages
+    (`request.meta['listing']`) are revalidated, as detail pages are mostly
+    requested once and storing their bodies would only grow the database.
+
+    Enabled with `CONDITIONALGET_ENABLED` setting.
+    '''
+
+    schema = '''
+        CREATE TABLE IF NOT EXISTS validators (
+            fingerprint TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            etag TEXT,
+            last_modified TEXT,
+            content_type TEXT,
+            body BLOB,
+            stored_at REAL
+        );
+    '''
+
+    def __init__(self, path, store_body=True, ttl=0, listings_only=False,
+                 fingerprinter=None, stats=None):
+        self.path = path
+        self.store_body = store_body
+        self.ttl = ttl
+        self.listings_only = listings_only
+        self.fingerprinter = fingerprinter
+        self.stats = stats
+        self.conn = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('CONDITIONALGET_ENABLED'):
+            raise NotConfigured
+        mw = cls(
+            path=settings.get('CONDITIONALGET_PATH', 'data/conditional.sqlite'),
+            store_body=settings.getbool('CONDITIONALGET_STORE_BODY', True),
+            ttl=settings.getfloat('CONDITIONALGET_TTL', 0),
+            listings_only=settings.getbool('CONDITIONALGET_LISTINGS_ONLY'),
+            fingerprinter=crawler.request_fingerprinter,
+            stats=crawler.stats,
+        )
+        crawler.signals.connect(mw.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(mw.spider_closed, signal=signals.spider_closed)
+        return mw
+
+    def spider_opened(self, spider):
+        self.conn = util.sqlite_connect(self.path, self.schema)
+        columns = [row[1] for row in
+                   self.conn.execute('PRAGMA table_info(validators)')]
+        with self.conn:
+            if 'stored_at' not in columns:
+                # Databases created before pages were evicted
+                self.conn.execute(
+                    'ALTER TABLE validators ADD COLUMN stored_at REAL')
+            if self.ttl:
+                deleted = self.conn.execute(
+                    'DELETE FROM validators '
+                    'WHERE stored_at IS NULL OR stored_at < ?',
+                    (time.time() - self.ttl,)).rowcount
+                self._inc_stats('conditionalget/evicted', spider, deleted)
+
+    def spider_closed(self, spider):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def process_request(self, request, spider):
+        if not self.is_handled(request):
+            return None
+
+        row = self.conn.execute(
+            'SELECT etag, last_modified FROM validators WHERE fingerprint = ?',
+            (self.fingerprint(request),)).fetchone()
+        if row is None:
+            return None
+
+        etag, last_modified = row
+        if etag:
+            request.headers.setdefault('If-None-Match', etag)
+        if last_modified:
+            request.headers.setdefault('If-Modified-Since', last_modified)
+        return None
+
+    def process_response(self, request, response, spider):
+        if not self.is_handled(request):
+            return response
+
+        if response.status == 304:
+            return self.stored_response(request, response, spider)
+
+        if response.status == 200:
+            self.store(request, response)
+        return response
+
+    def is_handled(self, request):
+        return request.method == 'GET' \
+            and (not self.listings_only or request.meta.get('listing'))
+
+    def stored_response(self, request, response, spider):
+        row = self.conn.execute(
+            'SELECT content_type, body FROM validators WHERE fingerprint = ?',
+            (self.fingerprint(request),)).fetchone()
+        if row is None or row[1] is None:
+            self._inc_stats('conditionalget/skipped', spider)
+            raise IgnoreRequest(f'Not modified: {request.url}')
+
+        with self.conn:
+            # Page is still in use, so it's not evicted
+            self.conn.execute(
+                'UPDATE validators SET stored_at = ? WHERE fingerprint = ?',
+                (time.time(), self.fingerprint(request)))
+
+        content_type, body = row
+        headers = {'Content-Type': content_type} if content_type else {}
+        body = zlib.decompress(body)
+        respcls = responsetypes.from_args(headers=headers, url=request.url,
+                                          body=body)
+        self._inc_stats('conditionalget/revalidated', spider)
+        return respcls(url=request.url, status=200, headers=headers,
+                       body=body, request=request, flags=['revalidated'])
+
+    def store(self, request, response):
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        def decode(value):
+            return value.decode('latin1') if value else None
+
+        body = zlib.compress(response.body) if self.store_body else None
+        # Committed right away, so the write lock isn't held and other
+        # crawlers sharing the database can write too
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO validators (fingerprint, url, etag, '
+                'last_modified, content_type, body, stored_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (self.fingerprint(request), request.url, decode(etag),
+                 decode(last_modified),
+                 decode(response.headers.get('Content-Type')), body,
+                 time.time()))
+
+    def fingerprint(self, request):
+        return self.fingerprinter.fingerprint(request).hex()
+
+    def _inc_stats(self, key, spider, count=1):
+        if self.stats is not None:
+            self.stats.inc_value(key, count, spider=spider)
+
+
+class CoalescingMiddleware(object):
+    '''
+    Downloads concurrent identical requests only once.
+
+    While a request is being downloaded, requests with the same fingerprint
+    (including those with `dont_filter`) wait for it and receive a copy of
+    its response (flagged `coalesced`). If the download fails, the waiting
+    requests are downloaded on their own.
+
+    Should be the last downloader middleware before the download, so it sees
+    responses before they are redirected or retried.
+    '''
+
+    def __init__(self, fingerprinter=None, stats=None):
+        self.fingerprinter = fingerprinter
+        self.stats = stats
+        # fingerprint -> [request being downloaded, waiting deferreds]
+        self.in_flight = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        mw = cls(fingerprinter=crawler.request_fingerprinter,
+                 stats=crawler.stats)
+        crawler.signals.connect(mw.spider_closed, signal=signals.spider_closed)
+        return mw
+
+    async def process_request(self, request, spider):
+        fp = self.fingerprinter.fingerprint(request)
+        if fp not in self.in_flight:
+            self.in_flight[fp] = [request, []]
+            return None
+
+        waiter = defer.Deferred()
+        self.in_flight[fp][1].append(waiter)
+        response = await maybe_deferred_to_future(waiter)
+        if response is None:
+            return None
+
+        self._inc_stats('coalesced/requests', spider)
+        return response.replace(request=request,
+                                flags=[*response.flags, 'coalesced'])
+
+    def process_response(self, request, response, spider):
+        self._release(request, response)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        self._release(request, None)
+
+    def spider_closed(self, spider):
+        for _, waiters in self.in_flight.values():
+            for waiter in waiters:
+                waiter.callback(None)
+        self.in_flight.clear()
+
+    def _release(self, request, response):
+        fp = self.fingerprinter.fingerprint(request)
+        leader, waiters = self.in_flight.get(fp, (None, []))
+        if leader is not request:
+            return
+        del self.in_flight[fp]
+        for waiter in waiters:
+            waiter.callback(response)
+
+    def _inc_stats(self, key, spider):
+        if self.stats is not None:
+            self.stats.inc_value(key, spider=spider)
+
+
+class SeleniumRenderMiddleware(object):
+    '''
+    Renders requests flagged with `request.meta['render']` in a browser.
+
+    Pages are loaded in worker threads on webdrivers borrowed from the
+    spider's `webdriver_pool` (see `common.components.SeleniumSpiderMixin`),
+    so the browser work doesn't block the other downloads. The rendered DOM
+    is returned as an `HtmlResponse` flagged `rendered`.
+
+    `request.meta['render']` can be `True` or a dict of options:
+
+    - `wait_for` - XPath of an element, or a function called with the
+                   webdriver, that the page is waited for. If it's not found
+                   in `timeout`, the page is returned as it is.
+
+    - `network_idle` - Wait until no resources are loaded for this many
+                       seconds (`True` for 0.5s). Default: `False`
+
+    - `timeout` - Max seconds to wait. Default: `RENDER_TIMEOUT`
+
+    - `script` - JavaScript executed after the page is loaded.
+
+    - `capture` - Capture XHR / fetch responses of the page into
+                  `response.meta['captured_responses']`. Spider must use
+                  `common.components.NetworkCaptureSpiderMixin`. Captured
+                  responses are kept in the `X-Captured-Responses` header of
+                  the rendered response, so they're restored also when the
+                  page is served from the HTTP cache.
+
+    Only GET requests are rendered. Requests of spiders without webdriver
+    pool are downloaded as usual. Number of worker threads is set with
+    `RENDER_WORKERS` (default: `WEBDRIVER_POOL_SIZE`).
+
+    Enabled with `RENDER_ENABLED` setting.
+    '''
+
+    captured_header = 'X-Captured-Responses'
+
+    def __init__(self, workers=2, timeout=10, stats=None):
+        self.workers = workers
+        self.timeout = timeout
+        self.stats = stats
+        self.threadpool = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('RENDER_ENABLED'):
+            raise NotConfigured
+        workers = settings.getint('RENDER_WORKERS') \
+            or settings.getint('WEBDRIVER_POOL_SIZE', 2)
+        mw = cls(workers=workers,
+                 timeout=settings.getfloat('RENDER_TIMEOUT', 10),
+                 stats=crawler.stats)
+        crawler.signals.connect(mw.spider_closed, signal=signals.spider_closed)
+        return mw
+
+    async def process_request(self, request, spider):
+        options = request.meta.get('render')
+        if not options or request.method != 'GET':
+            return None
+        pool = getattr(spider, 'webdriver_pool', None)
+        if pool is None:
+            spider.logger.warning('Cannot render "{}", spider has no webdriver '
+                                  'pool'.format(request.url))
+            return None
+        if not isinstance(options, dict):
+            options = {}
+
+        from twisted.internet import reactor
+        if self.threadpool is None:
+            self.threadpool = ThreadPool(minthreads=0, maxthreads=self.workers,
+                                         name='render')
+            self.threadpool.start()
+        d = threads.deferToThreadPool(reactor, self.threadpool, self.render,
+                                      request, spider, pool, options)
+        response = await maybe_deferred_to_future(d)
+        self._inc_stats('render/response_count', spider)
+        return response
+
+    def process_response(self, request, response, spider):
+        # Rendered pages served from the HTTP cache carry only the header
+        captured = response.headers.get(self.captured_header)
+        if captured is not None and 'captured_responses' not in request.meta:
+            request.meta['captured_responses'] = self._load_captured(captured)
+        return response
+
+    def render(self, request, spider, pool, options):
+        '''Load the page in a browser and return its DOM as HtmlResponse'''
+        can_capture = hasattr(spider, 'captured_responses')
+        capture = options.get('capture') and can_capture
+        headers = {'Content-Type': 'text/html; charset=utf-8'}
+        with pool.webdriver() as wd:
+            if capture:
+                spider.reset_capture(wd)
+            wd.get(request.url)
+            self.wait(wd, request, spider, options)
+            if options.get('script'):
+                wd.execute_script(options['script'])
+            if capture:
+                captured = spider.captured_responses(wd)
+                request.meta['captured_responses'] = captured
+                headers[self.captured_header] = self._dump_captured(captured)
+            elif can_capture:
+                # Performance log of the webdriver grows until it's read
+                spider.reset_capture(wd)
+            return HtmlResponse(url=wd.current_url, body=wd.page_source,
+                                encoding='utf-8', headers=headers,
+                                request=request, flags=['rendered'])
+
+    def wait(self, wd, request, spider, options):
+        wait = BrowserWait(wd, options.get('timeout', self.timeout))
+        try:
+            wait_for = options.get('wait_for')
+            if isinstance(wait_for, str):
+                wait.until_element(wait_for)
+            elif wait_for:
+                wait.until(wait_for)
+            network_idle = options.get('network_idle')
+            if network_idle:
+                wait.until_network_idle(
+                    0.5 if network_idle is True else network_idle)
+        except TimeoutException as e:
+            spider.logger.debug('Rendering "{}" without waiting further. '
+                                'Reason: {}'.format(request.url, e.msg))
+
+    def spider_closed(self, spider):
+        if self.threadpool is not None:
+            self.threadpool.stop()
+            self.threadpool = None
+
+    def _dump_captured(self, captured):
+        # Binary bodies are base64-encoded, escaped JSON fits in a header
+        return json.dumps([
+            {**response, 'body': base64.b64encode(response['body']).decode(),
+             'base64': True}
+            if isinstance(response['body'], bytes) else response
+            for response in captured
+        ])
+
+    def _load_captured(self, value):
+        captured = json.loads(value)
+        for response in captured:
+            if response.pop('base64', False):
+                response['body'] = base64.b64decode(response['body'])
+        return captured
+
+    def _inc_stats(self, key, spider):
+        if self.stats is not None:
+            self.stats.inc_value(key, spider=spider)
+
+
+class AdaptiveConcurrencyMiddleware(object):
+    '''
+    Adjusts concurrency and delay of each download slot (domain) to the
+    fastest rate the server tolerates, using AIMD (additive increase,
+    multiplicative decrease).
+
+    - Successful responses within `ADAPTIVECONCURRENCY_TARGET_LATENCY` first
+      shrink the slot's delay, then add one request to its concurrency per
+      round of requests, up to `ADAPTIVECONCURRENCY_MAX_CONCURRENCY`.
+    - Slower responses multiply the concurrency by
+      `ADAPTIVECONCURRENCY_BACKOFF`.
+    - Responses with `ADAPTIVECONCURRENCY_BACKOFF_HTTP_CODES` (429, 503) and
+      download errors also double the delay (honouring `Retry-After`), up to
+      `ADAPTIVECONCURRENCY_MAX_DELAY`.
+
+    Learned limits are stored in SQLite at `ADAPTIVECONCURRENCY_PATH` and
+    used as the starting point of the next run. Slots configured in
+    `DOWNLOAD_SLOTS` start from the configured values.
+
+    Replaces AutoThrottle, which should be disabled. Enabled with
+    `ADAPTIVECONCURRENCY_ENABLED` setting.
+    '''
+
+    schema = '''
+        CREATE TABLE IF NOT EXISTS slot_limits (
+            slot TEXT PRIMARY KEY,
+            concurrency REAL NOT NULL,
+            delay REAL NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+    '''
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        self.crawler = crawler
+        self.path = settings.get('ADAPTIVECONCURRENCY_PATH',
+                                 'data/concurrency.sqlite')
+        self.start_concurrency = settings.getint(
+            'ADAPTIVECONCURRENCY_START_CONCURRENCY', 2)
+        self.min_concurrency = settings.getint(
+            'ADAPTIVECONCURRENCY_MIN_CONCURRENCY', 1)
+        self.max_concurrency = settings.getint(
+            'ADAPTIVECONCURRENCY_MAX_CONCURRENCY', 16)
+        self.target_latency = settings.getfloat(
+            'ADAPTIVECONCURRENCY_TARGET_LATENCY', 5.0)
+        self.backoff = settings.getfloat('ADAPTIVECONCURRENCY_BACKOFF', 0.5)
+        self.backoff_delay = settings.getfloat(
+            'ADAPTIVECONCURRENCY_BACKOFF_DELAY', 1.0)
+        self.max_delay = settings.getfloat('ADAPTIVECONCURRENCY_MAX_DELAY', 120)
+        self.backoff_http_codes = {int(code) for code in settings.getlist(
+            'ADAPTIVECONCURRENCY_BACKOFF_HTTP_CODES', [429, 503])}
+
+        # slot -> [concurrency (fractional), delay, time of last backoff]
+        self.limits = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('ADAPTIVECONCURRENCY_ENABLED'):
+            raise NotConfigured
+        mw = cls(crawler)
+        crawler.signals.connect(mw.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(mw.spider_closed, signal=signals.spider_closed)
+        return mw
+
+    def spider_opened(self, spider):
+        conn = util.sqlite_connect(self.path, self.schema)
+        rows = conn.execute(
+            'SELECT slot, concurrency, delay FROM slot_limits').fetchall()
+        conn.close()
+
+        configured = self.crawler.settings.getdict('DOWNLOAD_SLOTS')
+        for slot, concurrency, delay in rows:
+            if slot not in configured:
+                self.limits[slot] = [concurrency, delay, 0]
+                self._apply(slot)
+
+    def spider_closed(self, spider):
+        if not self.limits:
+            return
+        updated_at = datetime.now().isoformat(timespec='seconds')
+        conn = util.sqlite_connect(self.path, self.schema)
+        with conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO slot_limits VALUES (?, ?, ?, ?)',
+                [(slot, concurrency, delay, updated_at)
+                 for slot, (concurrency, delay, _) in self.limits.items()])
+        conn.close()
+
+    def process_response(self, request, response, spider):
+        latency = request.meta.get('download_latency')
+        slot = request.meta.get('download_slot')
+        # Responses from cache or of coalesced requests were not downloaded
+        if latency is None or slot is None or 'cached' in response.flags:
+            return response
+
+        if response.status in self.backoff_http_codes:
+            self._backoff(slot, latency, delay=True,
+                          retry_after=response.headers.get('Retry-After'))
+        elif latency > self.target_latency:
+            self._backoff(slot, latency)
+        else:
+            self._increase(slot)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        slot = request.meta.get('download_slot')
+        # IgnoreRequest is raised by middlewares, not by the server
+        if slot is not None and not isinstance(exception, IgnoreRequest):
+            self._backoff(slot, self.target_latency, delay=True)
+
+    def _slot_limits(self, slot):
+        if slot not in self.limits:
+            configured = self.crawler.settings.getdict('DOWNLOAD_SLOTS')
+            slot_settings = configured.get(slot, {})
+            self.limits[slot] = [
+                slot_settings.get('concurrency', self.start_concurrency),
+                slot_settings.get('delay', 0.0),
+                0,
+            ]
+        return self.limits[slot]
+
+    def _increase(self, slot):
+        limits = self._slot_limits(slot)
+        concurrency, delay, _ = limits
+        if delay > 0:
+            limits[1] = delay * 0.9 if delay > 0.05 else 0.0
+        else:
+            # Adds one request per round of `concurrency` responses
+            limits[0] = min(self.max_concurrency, concurrency + 1 / concurrency)
+        self._apply(slot)
+
+    def _backoff(self, slot, latency, delay=False, retry_after=None):
+        limits = self._slot_limits(slot)
+        now = time.monotonic()
+        # Responses of requests sent before the last backoff reflect the old
+        # limits, so back off at most once per round trip
+        if now - limits[2] < max(latency, limits[1]):
+            return
+        limits[2] = now
+        limits[0] = max(self.min_concurrency, limits[0] * self.backoff)
+        if delay:
+            limits[1] = min(self.max_delay,
+                            max(self.backoff_delay, limits[1] * 2,
+                                self._parse_retry_after(retry_after)))
+        spider = self.crawler.spider
+        spider.logger.debug('Slot "{}" backed off to concurrency {} and delay '
+                            '{:.2f}s'.format(slot, int(limits[0]), limits[1]))
+        self._apply(slot)
+
+    def _apply(self, slot):
+        concurrency, delay, _ = self.limits[slot]
+        downloader = self.crawler.engine.downloader
+        # Slots are garbage-collected when idle and recreated from these
+        downloader.per_slot_settings.setdefault(slot, {}).update(
+            concurrency=int(concurrency), delay=delay)
+        live_slot = downloader.slots.get(slot)
+        if live_slot is not None:
+            live_slot.concurrency = int(concurrency)
+            live_slot.delay = delay
+
+    def _parse_retry_after(self, value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            # HTTP-date form is not supported
+            return 0.0
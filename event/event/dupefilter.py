@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+'''
+Request deduplication shared across the package
+
+Scrapy dupefilter docs: https://docs.scrapy.org/en/latest/topics/settings.html#dupefilter-class
+'''
+
+import hashlib
+import json
+from weakref import WeakKeyDictionary
+
+from scrapy.utils.python import to_unicode
+from scrapy.utils.request import RequestFingerprinter
+
+import common.util as util
+
+
+class CanonicalRequestFingerprinter(RequestFingerprinter):
+    '''
+    Request fingerprinter that treats requests for URLs differing only in
+    ignored query parameters as the same request.
+
+    Ignored parameters are given as name patterns in
+    `DEDUPE_IGNORE_QUERY_PARAMS`, and can be extended per request with
+    `request.meta['dedupe_ignore_params']`. Fragments are always ignored.
+
+    Since dupefilter, HTTP cache and other stores use the crawler's
+    fingerprinter, requests are deduplicated consistently across all of them.
+    '''
+
+    def __init__(self, crawler=None):
+        super().__init__(crawler)
+        self.ignore_params = crawler.settings.getlist(
+            'DEDUPE_IGNORE_QUERY_PARAMS') if crawler is not None else []
+        self._cache = WeakKeyDictionary()
+
+    def fingerprint(self, request):
+        if request not in self._cache:
+            ignore_params = [*self.ignore_params,
+                             *request.meta.get('dedupe_ignore_params', [])]
+            # Same data as hashed by Scrapy's fingerprinter, so fingerprints
+            # of URLs without ignored parameters don't change
+            data = json.dumps({
+                'method': to_unicode(request.method),
+                'url': util.canonical_url(request.url, ignore_params),
+                'body': (request.body or b'').hex(),
+                'headers': {},
+            }, sort_keys=True)
+            self._cache[request] = hashlib.sha1(data.encode()).digest()
+        return self._cache[request]
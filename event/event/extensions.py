@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+'''
+Extensions shared across the package
+
+Scrapy extensions docs: https://docs.scrapy.org/en/latest/topics/extensions.html
+'''
+
+
+import time
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.resolver import dnscache
+
+import common.util as util
+
+
+class PersistentDnsCache(object):
+    '''
+    Keeps DNS results between runs.
+
+    Hostnames resolved during a crawl are stored in an SQLite database at
+    `DNSCACHE_PERSIST_PATH`, shared by all spiders, and loaded into Scrapy's
+    DNS cache when a spider opens, so they're not resolved again until they
+    are older than `DNSCACHE_PERSIST_TTL` seconds. The resolver doesn't
+    report TTLs of DNS records, so the same TTL is used for all hostnames.
+
+    Works with the default resolver (`scrapy.resolver.CachingThreadedResolver`)
+    and requires `DNSCACHE_ENABLED`. Enabled with `DNSCACHE_PERSIST_ENABLED`.
+    '''
+
+    schema = '''
+        CREATE TABLE IF NOT EXISTS dns (
+            hostname TEXT PRIMARY KEY,
+            address TEXT NOT NULL,
+            resolved_at REAL NOT NULL
+        );
+    '''
+
+    def __init__(self, path, ttl, stats=None):
+        self.path = path
+        self.ttl = ttl
+        self.stats = stats
+        # Hostnames loaded from the database keep their original timestamp,
+        # otherwise they would never expire
+        self.loaded = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('DNSCACHE_PERSIST_ENABLED') \
+                or not settings.getbool('DNSCACHE_ENABLED'):
+            raise NotConfigured
+        ext = cls(
+            path=settings.get('DNSCACHE_PERSIST_PATH', 'data/netcache.sqlite'),
+            ttl=settings.getfloat('DNSCACHE_PERSIST_TTL', 60 * 60),
+            stats=crawler.stats,
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        conn = util.sqlite_connect(self.path, self.schema)
+        rows = conn.execute(
+            'SELECT hostname, address FROM dns WHERE resolved_at > ?',
+            (time.time() - self.ttl,)).fetchall()
+        conn.close()
+
+        for hostname, address in rows:
+            if hostname not in dnscache:
+                dnscache[hostname] = address
+                self.loaded[hostname] = address
+        if self.stats is not None:
+            self.stats.set_value('dnscache/loaded', len(rows), spider=spider)
+
+    def spider_closed(self, spider):
+        now = time.time()
+        resolved = [(hostname, address, now)
+                    for hostname, address in list(dnscache.items())
+                    if isinstance(address, str)
+                    and self.loaded.get(hostname) != address]
+        if not resolved:
+            return
+
+        conn = util.sqlite_connect(self.path, self.schema)
+        with conn:
+            conn.executemany('INSERT OR REPLACE INTO dns VALUES (?, ?, ?)',
+                             resolved)
+        conn.close()
+        if self.stats is not None:
+            self.stats.set_value('dnscache/stored', len(resolved),
+                                 spider=spider)
@@ -6,14 +6,74 @@ Scrapy item docs: https://docs.scrapy.org/en/latest/topics/items.html
 '''
 
 
+import contextlib
+import os
+from pathlib import Path
+import weakref
+import zlib
+
 import scrapy
 
 
+class CompressedBody(object):
+    '''
+    Body of a ResponseItem compressed with zlib. The original `str` or
+    `bytes` value is restored with `load()`.
+    '''
+
+    def __init__(self, body, level=6):
+        self.is_text = isinstance(body, str)
+        data = body.encode('utf-8') if self.is_text else body
+        self.data = zlib.compress(data, level)
+
+    def load(self):
+        data = zlib.decompress(self.data)
+        return data.decode('utf-8') if self.is_text else data
+
+
+class SpilledBody(CompressedBody):
+    '''
+    CompressedBody kept in a file instead of in memory. The file is removed
+    once the body is garbage collected.
+    '''
+
+    def __init__(self, compressed, path):
+        self.is_text = compressed.is_text
+        self.path = Path(path)
+        self.path.write_bytes(compressed.data)
+        weakref.finalize(self, _remove_file, str(self.path))
+
+    @property
+    def data(self):
+        return self.path.read_bytes()
+
+
+def _remove_file(path):
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+
+
 class ResponseItem(scrapy.Item):
+    '''
+    Raw or partially parsed response data passed from spiders to pipelines.
+
+    Body may be stored compressed or spilled to disk (see
+    `event.spider_middleware.ResponseItemCompactorMiddleware`). Reading
+    `item['body']` always returns the original value.
+    '''
+
     body = scrapy.Field()
+    # Encoding of `body` if it's `bytes` of a text document
+    encoding = scrapy.Field()
     url = scrapy.Field()
     meta = scrapy.Field()
 
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if isinstance(value, CompressedBody):
+            return value.load()
+        return value
+
 
 class EventItem(scrapy.Item):
     name = scrapy.Field()
@@ -16,100 +16,141 @@ import event.util as util
 from common.util import xpath_class, is_url, unpack_url, pack_url
 
 
-class EventsCalendarPipeline(object):
+class JsonLdEventPipeline(object):
+    '''
+    Pipeline which maps schema.org Event data that the page embeds as JSON-LD
+    straight into EventItem.
+
+    Subclasses fill in the fields that the JSON-LD data lacks by overriding
+    `process_fallback`, which receives the page selector and the event
+    prefilled from JSON-LD.
+    '''
+
+    def process_item(self, item: ResponseItem, spider):
+        res = util.item_selector(item)
+
+        event = EventItem()
+        events = util.jsonld_events(res)
+        if events:
+            event.update(util.jsonld_event_fields(events[0]))
+
+        return self.process_fallback(item, res, event, spider)
+
+    def process_fallback(self, item: ResponseItem, res, event: EventItem, spider):
+        return event
+
+
+class EventsCalendarPipeline(JsonLdEventPipeline):
     '''
     Pipeline for spiders that scrape WP sites that use
     The Events Calendar by Modern Tribe (https://theeventscalendar.com/)
+
+    Event data is taken from the JSON-LD the plugin embeds in event pages.
+    XPath queries are run only for fields missing in the JSON-LD data.
+
+    Events fetched from the plugin's REST API (see `EventsCalendarSpider.use_api`)
+    are mapped directly.
     '''
 
     def process_item(self, item: ResponseItem, spider):
+        if isinstance(item.get('body'), dict):
+            return self.process_api_event(item['body'])
+        return super().process_item(item, spider)
+
+    def process_api_event(self, data):
 
         def parseDate(datestring):
-            if datestring is None:
+            if not datestring:
                 return None
-            return datetime.datetime.strptime(datestring, '%Y-%m-%d')
-
-        res = scrapy.Selector(text=item['body'])
-
-        name = res.xpath(
-            f"//h1[{xpath_class(['tribe-events-single-event-title'])}]/text()").get()
-        desc = res.xpath(
-            f"normalize-space(string(//div[{xpath_class(['tribe-events-content'])}]))").get()
-        start = res.xpath(
-            f"//abbr[{xpath_class(['tribe-events-start-date', 'tribe-events-start-datetime'])}]/@title").get()
-        end = res.xpath(
-            f"//abbr[{xpath_class(['tribe-events-end-date', 'tribe-events-end-datetime'])}]/@title").get()
-        event_type = res.xpath(
-            f"//dd[{xpath_class(['tribe-events-event-categories'])}]/a/text()").get('')
-        event_url = res.xpath(
-            f"//dd[{xpath_class(['tribe-events-event-url'])}]/a/@href").get()
-        organizer = res.xpath(
-            f"//dd[{xpath_class(['tribe-organizer'])}]/text()").get('')
-        organizer_url = res.xpath(
-            f"//dd[{xpath_class(['tribe-organizer-url'])}]/a/@href").get('')
-        venue = res.xpath(
-            f"//dd[{xpath_class(['tribe-venue'])}]/text()").get('')
-        city = res.xpath(
-            f"//span[{xpath_class(['tribe-locality'])}]/text()").get('')
-        state = res.xpath(
-            f"//abbr[{xpath_class(['tribe-region'])}]/@title").get('')
-        country = res.xpath(
-            f"//span[{xpath_class(['tribe-country-name'])}]/text()").get('')
-        email = res.xpath(
-            f"//dd[{xpath_class(['tribe-organizer-email'])}]/text()").get('')
-
-        event = EventItem()
+            return datetime.datetime.strptime(datestring[:10], '%Y-%m-%d')
 
-        event['name'] = name.strip()
-        event['event_url'] = event_url.strip()
-        event['description'] = desc.strip()
+        def text(s):
+            return util.html_to_text(s) or ''
 
-        # event['focus'] = scrapy.Field()
-        event['event_type'] = event_type.lower().strip()
+        # Venue and organizer are empty lists if not set
+        venue = data.get('venue') or {}
+        organizer = (data.get('organizer') or [{}])[0]
+        categories = data.get('categories') or [{}]
+        cost_details = data.get('cost_details') or {}
+        prices = cost_details.get('values') or []
 
-        event['start'] = parseDate(start)
-        event['end'] = parseDate(end)
-        # event['length_in_days'] = scrapy.Field()
+        event = EventItem()
 
-        event['country'] = country.strip()
-        event['state'] = state.strip()
-        event['city'] = city.strip()
-        event['venue'] = venue.strip()
+        event['name'] = text(data.get('title'))
+        event['event_url'] = data.get('website') or data.get('url')
+        event['description'] = text(data.get('description'))
 
-        # event['price'] = scrapy.Field()
-        # event['currency'] = scrapy.Field()
+        event['event_type'] = text(categories[0].get('name')).lower()
 
-        # event['stand'] = scrapy.Field()
-        # event['abstract'] = scrapy.Field()
-        # event['talk'] = scrapy.Field()
+        event['start'] = parseDate(data.get('start_date'))
+        event['end'] = parseDate(data.get('end_date'))
 
-        # event['ticket_deadline'] = scrapy.Field()
-        # event['stand_deadline'] = scrapy.Field()
-        # event['talk_deadline'] = scrapy.Field()
+        event['country'] = text(venue.get('country'))
+        event['state'] = text(venue.get('state') or venue.get('province'))
+        event['city'] = text(venue.get('city'))
+        event['venue'] = text(venue.get('venue'))
 
-        # event['contact_name'] = scrapy.Field()
-        event['contact_email'] = email.strip()
-        # event['contact_phone'] = scrapy.Field()
+        event['price'] = prices[0] if prices else None
+        # ISO 4217 code, `currency_symbol` is only e.g. '$'
+        event['currency'] = cost_details.get('currency_code') or None
 
-        event['organizer'] = organizer.strip()
-        event['organizer_url'] = organizer_url.strip()
+        event['contact_email'] = text(organizer.get('email'))
+        event['contact_phone'] = text(organizer.get('phone'))
 
-        # event['newsletter'] = scrapy.Field()
-        # event['twitter'] = scrapy.Field()
-        # event['facebook'] = scrapy.Field()
-        # event['linkedin'] = scrapy.Field()
-        # event['instagram'] = scrapy.Field()
+        event['organizer'] = text(organizer.get('organizer'))
+        event['organizer_url'] = organizer.get('website') or ''
 
-        # event['hashtags'] = scrapy.Field()
+        return event
 
-        # event['relevant_to_bio'] = scrapy.Field()
-        # event['relevant_to_ind_bio'] = scrapy.Field()
+    def process_fallback(self, item: ResponseItem, res, event: EventItem, spider):
 
-        # event['ignore'] = scrapy.Field()
-        # event['notes'] = scrapy.Field()
+        def parseDate(datestring):
+            if datestring is None:
+                return None
+            return datetime.datetime.strptime(datestring, '%Y-%m-%d')
 
-        # event['source'] = scrapy.Field()
-        # event['id'] = scrapy.Field()
+        def strip(s):
+            return s.strip() if s is not None else None
+
+        def xpath(field, query, default=None, parse=strip):
+            if event.get(field) is not None:
+                return
+            event[field] = parse(res.xpath(query).get(default))
+
+        xpath('name',
+              f"//h1[{xpath_class(['tribe-events-single-event-title'])}]/text()")
+        xpath('description',
+              f"normalize-space(string(//div[{xpath_class(['tribe-events-content'])}]))")
+        xpath('start',
+              f"//abbr[{xpath_class(['tribe-events-start-date', 'tribe-events-start-datetime'])}]/@title",
+              parse=parseDate)
+        xpath('end',
+              f"//abbr[{xpath_class(['tribe-events-end-date', 'tribe-events-end-datetime'])}]/@title",
+              parse=parseDate)
+        xpath('event_type',
+              f"//dd[{xpath_class(['tribe-events-event-categories'])}]/a/text()", '',
+              parse=lambda s: s.lower().strip())
+        xpath('organizer',
+              f"//dd[{xpath_class(['tribe-organizer'])}]/text()", '')
+        xpath('organizer_url',
+              f"//dd[{xpath_class(['tribe-organizer-url'])}]/a/@href", '')
+        xpath('venue',
+              f"//dd[{xpath_class(['tribe-venue'])}]/text()", '')
+        xpath('city',
+              f"//span[{xpath_class(['tribe-locality'])}]/text()", '')
+        xpath('state',
+              f"//abbr[{xpath_class(['tribe-region'])}]/@title", '')
+        xpath('country',
+              f"//span[{xpath_class(['tribe-country-name'])}]/text()", '')
+        xpath('contact_email',
+              f"//dd[{xpath_class(['tribe-organizer-email'])}]/text()", '')
+
+        # JSON-LD `url` is the event's page on the site, while the "Website"
+        # detail links to the event itself, so the latter is preferred
+        website = res.xpath(
+            f"//dd[{xpath_class(['tribe-events-event-url'])}]/a/@href").get()
+        if website is not None or event.get('event_url') is None:
+            event['event_url'] = strip(website)
 
         return event
 
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+'''
+Scheduler shared across the package
+
+Scrapy scheduler docs: https://docs.scrapy.org/en/latest/topics/scheduler.html
+'''
+
+from collections import deque
+
+from scrapy.core.scheduler import Scheduler
+
+
+class BacklogAwareScheduler(Scheduler):
+    '''
+    Scheduler that drains detail pages before expanding listings.
+
+    Listing pages are marked with `request.meta['listing']`. Their priority
+    is lowered by `SCHEDULER_LISTING_PRIORITY`, so detail pages they yield
+    are crawled first. Listing pages are also held back while the backlog is
+    high, that is while at least `SCHEDULER_MAX_BACKLOG` requests are being
+    downloaded or wait for the spider, or at least
+    `SCHEDULER_MAX_ITEM_BACKLOG` items are in the pipelines.
+
+    The crawl then produces items at a steady rate, and the number of queued
+    requests stays bounded.
+    '''
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        scheduler = super().from_crawler(crawler)
+        settings = crawler.settings
+        scheduler.crawler = crawler
+        scheduler.listing_priority = settings.getint(
+            'SCHEDULER_LISTING_PRIORITY', -10)
+        scheduler.max_backlog = settings.getint('SCHEDULER_MAX_BACKLOG', 100)
+        scheduler.max_item_backlog = settings.getint(
+            'SCHEDULER_MAX_ITEM_BACKLOG', 100)
+        scheduler.held = deque()
+        return scheduler
+
+    def enqueue_request(self, request):
+        # Retried or redirected requests keep the meta, and so the priority
+        if request.meta.get('listing') and \
+                not request.meta.get('listing_prioritized'):
+            request.priority += self.listing_priority
+            request.meta['listing_prioritized'] = True
+        return super().enqueue_request(request)
+
+    def next_request(self):
+        request = super().next_request()
+        is_listing = request is not None and request.meta.get('listing')
+
+        if self.is_backlogged():
+            if is_listing:
+                self.held.append(request)
+                self.stats.inc_value('scheduler/held/listing')
+                return None
+            return request
+
+        if request is None:
+            return self.held.popleft() if self.held else None
+        if is_listing and self.held:
+            # Listing pages are released in the order they were held
+            self.held.append(request)
+            return self.held.popleft()
+        return request
+
+    def has_pending_requests(self):
+        return len(self) > 0
+
+    def __len__(self):
+        return super().__len__() + len(self.held)
+
+    def is_backlogged(self):
+        engine = self.crawler.engine
+        scraper_slot = engine.scraper.slot
+        if scraper_slot is None:
+            return False
+        requests = len(engine.downloader.active) + len(scraper_slot.queue) \
+            + len(scraper_slot.active)
+        if not requests and not scraper_slot.itemproc_size:
+            # Holding listing pages back now would stall the crawl
+            return False
+        return requests >= self.max_backlog \
+            or scraper_slot.itemproc_size >= self.max_item_backlog
@@ -13,6 +13,21 @@ BOT_NAME = 'event'
 
 SPIDER_MODULES = ['event.spiders']
 NEWSPIDER_MODULE = 'event.spiders'
+COMMANDS_MODULE = 'event.commands'
+
+# Crawl detail pages before expanding listings (meta['listing'])
+# See event.scheduler.BacklogAwareScheduler
+SCHEDULER = 'event.scheduler.BacklogAwareScheduler'
+SCHEDULER_LISTING_PRIORITY = -10
+# Listing pages are held while more requests are in flight or more items
+# are in the pipelines
+SCHEDULER_MAX_BACKLOG = 100
+SCHEDULER_MAX_ITEM_BACKLOG = 100
+
+# Treat URLs differing only in these query parameters (name patterns) and
+# fragments as the same request. See event.dupefilter.CanonicalRequestFingerprinter
+REQUEST_FINGERPRINTER_CLASS = 'event.dupefilter.CanonicalRequestFingerprinter'
+DEDUPE_IGNORE_QUERY_PARAMS = ['utm_*', 'fbclid', 'gclid']
 
 
 # Crawl responsibly by identifying yourself (and your website) on the user-agent
@@ -60,23 +75,116 @@ ROBOTSTXT_OBEY = True
 SPIDER_MIDDLEWARES = {
     #    'fr.middlewares.FrSpiderMiddleware': 543,
     # 'fr.middlewares.SpiderExceptionMiddleware': 550,
+    'event.spider_middleware.ResponseItemCompactorMiddleware': 100,
+    'event.spider_middleware.StartRequestShardMiddleware': 50,
 }
 
+# Limit memory held by ResponseItems waiting for pipelines
+# See event.spider_middleware.ResponseItemCompactorMiddleware
+# Meta keys which are used by pipelines, others are dropped
+RESPONSEITEM_META_KEYS = ['row_index', 'organizer']
+RESPONSEITEM_COMPRESS_MIN_SIZE = 1024
+RESPONSEITEM_MEMORY_LIMIT = 64 * 1024 * 1024
+# RESPONSEITEM_SPILL_DIR = None
+
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
 DOWNLOADER_MIDDLEWARES = {
+    'event.downloader_middleware.SeenStoreMiddleware': 50,
+    'scrapy.downloadermiddlewares.robotstxt.RobotsTxtMiddleware': None,
+    'event.downloader_middleware.PersistentRobotsTxtMiddleware': 100,
+    # Above CookiesMiddleware (300) to pass browser cookies to the cookie jar
+    'event.downloader_middleware.BrowserSessionMiddleware': 290,
     'scrapy.downloadermiddlewares.cookies.CookiesMiddleware': 300,
-    'scrapy.contrib.downloadermiddleware.useragent.UserAgentMiddleware': None,
+    # Below HttpCompressionMiddleware (590) to store decompressed bodies
+    'event.downloader_middleware.ConditionalGetMiddleware': 560,
+    # Closest to the downloader to see responses before redirects and retries
+    # Above RetryMiddleware (550) to see responses before they're retried
+    'event.downloader_middleware.AdaptiveConcurrencyMiddleware': 940,
+    'event.downloader_middleware.CoalescingMiddleware': 950,
+    # Below CoalescingMiddleware and HttpCacheMiddleware (900) so rendered
+    # pages are coalesced and cached
+    'event.downloader_middleware.SeleniumRenderMiddleware': 960,
+    'scrapy.downloadermiddlewares.useragent.UserAgentMiddleware': None,
     # 'random_useragent.RandomUserAgentMiddleware': 400,
     # 'rotating_proxies.middlewares.RotatingProxyMiddleware': 610,
     # 'rotating_proxies.middlewares.BanDetectionMiddleware': 620,
 }
 
+# Skip event detail pages scraped in previous runs (incremental crawls)
+# See event.downloader_middleware.SeenStoreMiddleware
+SEENSTORE_ENABLED = False
+SEENSTORE_PATH = 'data/seen.sqlite'
+# Re-check pages scraped more than a week ago
+SEENSTORE_TTL = 7 * 24 * 60 * 60
+# SEENSTORE_CALLBACKS = ['parse_entry']
+
+# Reuse robots.txt files fetched in previous runs
+# See event.downloader_middleware.PersistentRobotsTxtMiddleware
+ROBOTSTXT_CACHE_ENABLED = True
+ROBOTSTXT_CACHE_PATH = 'data/netcache.sqlite'
+ROBOTSTXT_CACHE_TTL = 24 * 60 * 60
+
+# Revalidate pages downloaded in previous runs with ETag / Last-Modified
+# See event.downloader_middleware.ConditionalGetMiddleware
+CONDITIONALGET_ENABLED = True
+CONDITIONALGET_PATH = 'data/conditional.sqlite'
+# Only listing pages (meta['listing']) are revalidated, like change detection
+CONDITIONALGET_LISTINGS_ONLY = True
+# If False, pages that were not modified are skipped instead
+CONDITIONALGET_STORE_BODY = True
+# Forget pages not requested for a month
+CONDITIONALGET_TTL = 30 * 24 * 60 * 60
+
+# Close spiders early if their listing did not change since the last run
+# See common.components.ListingChangeDetectionMixin
+CHANGEDETECTION_ENABLED = True
+CHANGEDETECTION_PATH = 'data/listing_hashes.sqlite'
+
+# Adapt concurrency and delay of each domain to what it tolerates (AIMD)
+# See event.downloader_middleware.AdaptiveConcurrencyMiddleware
+ADAPTIVECONCURRENCY_ENABLED = True
+ADAPTIVECONCURRENCY_PATH = 'data/concurrency.sqlite'
+ADAPTIVECONCURRENCY_START_CONCURRENCY = 2
+ADAPTIVECONCURRENCY_MAX_CONCURRENCY = 16
+# Responses slower than this (seconds) reduce concurrency
+ADAPTIVECONCURRENCY_TARGET_LATENCY = 5.0
+ADAPTIVECONCURRENCY_MAX_DELAY = 120
+# ADAPTIVECONCURRENCY_BACKOFF_HTTP_CODES = [429, 503]
+
+# Browsers shared by Selenium spiders of the process
+# See common.components.WebdriverPool
+WEBDRIVER_POOL_SIZE = 2
+# Browsers started when the pool is first used
+WEBDRIVER_POOL_WARMUP = 0
+# Restart browsers after this many tasks to release leaked memory
+WEBDRIVER_POOL_MAX_USES = 100
+# Seconds to wait for a free browser
+WEBDRIVER_POOL_TIMEOUT = 60
+
+# Render requests flagged with meta['render'] in pooled browsers
+# See event.downloader_middleware.SeleniumRenderMiddleware
+RENDER_ENABLED = True
+# RENDER_WORKERS = WEBDRIVER_POOL_SIZE
+# Max seconds to wait for a rendered page to show the expected content
+RENDER_TIMEOUT = 10
+
+# Retry requests of expired browser sessions with a new session
+# See event.downloader_middleware.BrowserSessionMiddleware
+BROWSERSESSION_MAX_RETRIES = 1
+
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
-# EXTENSIONS = {
-#    'scrapy.extensions.telnet.TelnetConsole': None,
-# }
+EXTENSIONS = {
+    # 'scrapy.extensions.telnet.TelnetConsole': None,
+    'event.extensions.PersistentDnsCache': 500,
+}
+
+# Reuse DNS results of previous runs
+# See event.extensions.PersistentDnsCache
+DNSCACHE_PERSIST_ENABLED = True
+DNSCACHE_PERSIST_PATH = 'data/netcache.sqlite'
+DNSCACHE_PERSIST_TTL = 60 * 60
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
@@ -86,21 +194,24 @@ DOWNLOADER_MIDDLEWARES = {
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
-AUTOTHROTTLE_ENABLED = True
+# Replaced by event.downloader_middleware.AdaptiveConcurrencyMiddleware
+AUTOTHROTTLE_ENABLED = False
 # The initial download delay
 # AUTOTHROTTLE_START_DELAY = 5
 # The maximum download delay to be set in case of high latencies
-AUTOTHROTTLE_MAX_DELAY = 120
+# AUTOTHROTTLE_MAX_DELAY = 120
 # The average number of requests Scrapy should be sending in parallel to
 # each remote server
-AUTOTHROTTLE_TARGET_CONCURRENCY = 0.5
+# AUTOTHROTTLE_TARGET_CONCURRENCY = 0.5
 # Enable showing throttling stats for every response received:
 # AUTOTHROTTLE_DEBUG = False
 
 # Enable and configure HTTP caching (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
+# Run spider from the cache with `scrapy replay <spider>`
 # HTTPCACHE_ENABLED = True
 # HTTPCACHE_EXPIRATION_SECS = 0
 # HTTPCACHE_DIR = 'httpcache'
 # HTTPCACHE_IGNORE_HTTP_CODES = []
-# HTTPCACHE_STORAGE = 'scrapy.extensions.httpcache.FilesystemCacheStorage'
+HTTPCACHE_STORAGE = 'common.httpcache.SqliteCacheStorage'
+# HTTPCACHE_SQLITE_COMPRESSION_LEVEL = 6
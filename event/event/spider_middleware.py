@@ -6,12 +6,17 @@ Scrapy spider middleware docs: https://docs.scrapy.org/en/latest/topics/spider-m
 '''
 
 
-import csv
-import io
+import itertools
+import shutil
+import tempfile
+from pathlib import Path
+import weakref
 
 from scrapy import signals
+from scrapy.exceptions import NotConfigured
 
-from event.items import ResponseItem
+from event.items import ResponseItem, CompressedBody, SpilledBody
+import event.util as util
 
 
 class SpiderMiddleware(object):
@@ -63,19 +68,152 @@ class SpiderMiddleware(object):
 
 
 class OutputCSVParserMiddleware(object):
+    '''
+    Replaces ResponseItems holding a CSV export with the rows of the export.
 
-    def process_spider_output(self, response, result: ResponseItem, spider):
+    Rows are parsed and yielded one by one, so pipelines can start working
+    before the whole export is parsed.
+    '''
 
-        new_results = []
+    def process_spider_output(self, response, result: ResponseItem, spider):
         for res in result:
             if not isinstance(res, ResponseItem):
-                new_results.append(res)
+                yield res
                 continue
 
-            csv_io = io.StringIO(res['body'])
-            headers = csv_io.readline().strip().split(',')
-            reader = csv.DictReader(csv_io, fieldnames=headers)
+            yield from util.iter_csv_rows(res['body'], res.get('encoding'))
+
+
+class StartRequestShardMiddleware(object):
+    '''
+    Keeps only every `SHARD_COUNT`-th start request, starting from
+    `SHARD_INDEX`, so a spider can be crawled by several processes,
+    each with its own shard of the start requests.
 
-            new_results.extend(reader)
+    Enabled if `SHARD_COUNT` is greater than 1.
+    '''
+
+    def __init__(self, index, count):
+        self.index = index
+        self.count = count
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        count = crawler.settings.getint('SHARD_COUNT', 1)
+        if count <= 1:
+            raise NotConfigured
+        return cls(crawler.settings.getint('SHARD_INDEX', 0), count)
+
+    async def process_start(self, start):
+        i = 0
+        async for item_or_request in start:
+            if i % self.count == self.index:
+                yield item_or_request
+            i += 1
 
-        return new_results
+    def process_start_requests(self, start_requests, spider):
+        for i, request in enumerate(start_requests):
+            if i % self.count == self.index:
+                yield request
+
+
+class ResponseItemCompactorMiddleware(object):
+    '''
+    Reduces memory held by ResponseItems that wait for the pipelines.
+
+    - Only `response.meta` keys listed in `RESPONSEITEM_META_KEYS` are kept,
+      dropping download internals (`download_slot`, `depth`, ...). If the
+      setting is not set, meta is left as is.
+    - Bodies of at least `RESPONSEITEM_COMPRESS_MIN_SIZE` bytes are compressed.
+    - Once the compressed bodies of in-flight items take more than
+      `RESPONSEITEM_MEMORY_LIMIT` bytes, further bodies are spilled to files
+      in `RESPONSEITEM_SPILL_DIR` (temporary directory by default).
+
+    Memory of an item is released when the item is garbage collected, that
+    is once the pipelines are done with it.
+    '''
+
+    def __init__(self, meta_keys=None, compress_min_size=1024,
+                 memory_limit=64 * 1024 * 1024, spill_dir=None, stats=None):
+        self.meta_keys = set(meta_keys) if meta_keys is not None else None
+        self.compress_min_size = compress_min_size
+        self.memory_limit = memory_limit
+        self.spill_dir = spill_dir
+        self.stats = stats
+
+        self.memory_size = 0
+        self._spill_counter = itertools.count()
+        self._tmp_spill_dir = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        meta_keys = settings.get('RESPONSEITEM_META_KEYS')
+        mw = cls(
+            meta_keys=settings.getlist('RESPONSEITEM_META_KEYS')
+            if meta_keys is not None else None,
+            compress_min_size=settings.getint(
+                'RESPONSEITEM_COMPRESS_MIN_SIZE', 1024),
+            memory_limit=settings.getint(
+                'RESPONSEITEM_MEMORY_LIMIT', 64 * 1024 * 1024),
+            spill_dir=settings.get('RESPONSEITEM_SPILL_DIR'),
+            stats=crawler.stats,
+        )
+        crawler.signals.connect(mw.spider_closed, signal=signals.spider_closed)
+        return mw
+
+    def process_spider_output(self, response, result, spider):
+        for res in result:
+            if isinstance(res, ResponseItem):
+                self.compact(res, spider)
+            yield res
+
+    async def process_spider_output_async(self, response, result, spider):
+        async for res in result:
+            if isinstance(res, ResponseItem):
+                self.compact(res, spider)
+            yield res
+
+    def compact(self, item, spider):
+        meta = item.get('meta')
+        if meta is not None and self.meta_keys is not None:
+            item['meta'] = {k: v for k, v in meta.items()
+                            if k in self.meta_keys}
+
+        body = item.get('body')
+        if not isinstance(body, (str, bytes)) \
+                or len(body) < self.compress_min_size:
+            return item
+
+        compressed = CompressedBody(body)
+        size = len(compressed.data)
+        if self.memory_size + size > self.memory_limit:
+            item['body'] = SpilledBody(compressed, self._spill_path(spider))
+            self._inc_stats('responseitem/spilled', spider)
+        else:
+            self.memory_size += size
+            weakref.finalize(compressed, self._release, size)
+            item['body'] = compressed
+            self._inc_stats('responseitem/compressed', spider)
+        return item
+
+    def spider_closed(self, spider):
+        if self._tmp_spill_dir is not None:
+            shutil.rmtree(self._tmp_spill_dir, ignore_errors=True)
+
+    def _release(self, size):
+        self.memory_size -= size
+
+    def _spill_path(self, spider):
+        spill_dir = self.spill_dir
+        if spill_dir is None:
+            if self._tmp_spill_dir is None:
+                self._tmp_spill_dir = tempfile.mkdtemp(
+                    prefix=f'{spider.name}__items__')
+            spill_dir = self._tmp_spill_dir
+        Path(spill_dir).mkdir(parents=True, exist_ok=True)
+        return Path(spill_dir, f'{next(self._spill_counter)}.zlib')
+
+    def _inc_stats(self, key, spider):
+        if self.stats is not None:
+            self.stats.inc_value(key, spider=spider)
@@ -37,7 +37,9 @@ class AusbiotechEventSpider(scrapy.Spider):
             mo_total = curr_mo + i
             mo = ((mo_total - 1) % 12) + 1
             yr = curr_yr + ((mo_total - 1) // 12)
-            yield scrapy.Request(f'{self.base_url}{self.events_path}?month={mo}&year={yr}')
+            yield scrapy.Request(
+                f'{self.base_url}{self.events_path}?month={mo}&year={yr}',
+                meta={'listing': True})
 
     def parse(self, response: scrapy.http.Response, **kwargs):
         entry_paths = response.xpath(
@@ -14,6 +14,7 @@ import pycountry
 import scrapy
 
 from event.items import EventItem, ResponseItem
+from event.util import item_selector
 from common.util import xpath_class, lmap
 
 
@@ -63,19 +64,19 @@ class BIOEventPipeline(object):
                 country = state_or_country
             return city, state, country
 
-        res = scrapy.Selector(text=item['body'])
+        res = item_selector(item)
 
         name = res.xpath(
-            f"normalize-space(string(//a[{xpath_class(['event-name'])}]))").get()
+            f"normalize-space(string(.//a[{xpath_class(['event-name'])}]))").get()
         desc = res.xpath(
-            f"//td[{xpath_class(['desc-cell'])}]/text()").get()
+            f".//td[{xpath_class(['desc-cell'])}]/text()").get()
         location = res.xpath(
-            f"//td[{xpath_class(['loc-cell'])}]/text()").get()
+            f".//td[{xpath_class(['loc-cell'])}]/text()").get()
 
         date = res.xpath(
-            f"//td[{xpath_class(['views-field-field-date'])}]/text()").get('-')
+            f".//td[{xpath_class(['views-field-field-date'])}]/text()").get('-')
         event_url = res.xpath(
-            f"//a[{xpath_class(['event-name'])}]/@href").get()
+            f".//a[{xpath_class(['event-name'])}]/@href").get()
 
         start, end = parse_date(date)
         city, state, country = parse_location(location)
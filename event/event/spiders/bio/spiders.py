@@ -1,11 +1,12 @@
 import scrapy
 
+from common.components import ListingChangeDetectionMixin
 from common.util import xpath_class
 
 from event.items import ResponseItem
 
 
-class BIOEventSpider(scrapy.Spider):
+class BIOEventSpider(ListingChangeDetectionMixin):
 
     name = 'bio_event'
     base_url = 'https://www.bio.org'
@@ -30,7 +31,8 @@ class BIOEventSpider(scrapy.Spider):
 
     def parse(self, response: scrapy.http.Response, **kwargs):
         entries = response.xpath(
-            f'//div[{xpath_class(["event-search"])}]//table/tbody/tr').getall()
+            f'//div[{xpath_class(["event-search"])}]//table/tbody/tr')
+        self.detect_listing_change(entries)
 
         for entry in entries:
-            yield ResponseItem({'body': entry, 'meta': response.meta})
+            yield ResponseItem({'body': entry.get(), 'meta': response.meta})
@@ -12,6 +12,9 @@ class BioBasedPressEventPipeline(EventsCalendarPipeline):
 
     def process_item(self, item, spider):
         event = super().process_item(item, spider)
-        event['city'] = event['venue']
-        del event['venue']
+        # The site lists the city as the venue. Address from JSON-LD data
+        # holds the actual city, if present
+        venue = event.pop('venue', '')
+        if not event.get('city'):
+            event['city'] = venue
         return event
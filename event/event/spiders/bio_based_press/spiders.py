@@ -7,6 +7,7 @@ class BioBasedPressEventSpider(EventsCalendarSpider):
     base_url = 'https://www.biobasedpress.eu'
     events_path = '/events/'
     source = 'Bio Based Press'
+    use_api = True
     custom_settings = {
         'ITEM_PIPELINES': {
             'event.spiders.bio_based_press.pipelines.BioBasedPressEventPipeline': 400,
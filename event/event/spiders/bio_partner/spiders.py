@@ -1,11 +1,12 @@
-import json
-
 import scrapy
 
+from common.components import ListingChangeDetectionMixin
+from common.util import iter_json_members
+
 from event.items import ResponseItem
 
 
-class BioPartnerEventSpider(scrapy.Spider):
+class BioPartnerEventSpider(ListingChangeDetectionMixin):
 
     name = 'bio_partner_event'
     base_url = 'http://www.biopartner.co.uk'
@@ -33,10 +34,14 @@ class BioPartnerEventSpider(scrapy.Spider):
             })
 
     def parse(self, response: scrapy.http.Response, **kwargs):
-        data = json.loads(response.text)
-        if data['message']:
-            for msg in data['message']:
-                self.logger.warning(msg)
-
-        for entry in data['list']:
-            yield ResponseItem({'body': entry, 'meta': response.meta})
+        self.detect_listing_change(response.body)
+
+        # Entries are decoded and yielded one by one instead of decoding
+        # the whole listing first
+        members = iter_json_members(response.text, stream=['list'])
+        for key, value in members:
+            if key == 'message':
+                for msg in value or []:
+                    self.logger.warning(msg)
+            elif key == 'list':
+                yield ResponseItem({'body': value, 'meta': response.meta})
@@ -11,6 +11,7 @@ import re
 import scrapy
 
 from event.items import EventItem, ResponseItem
+from event.util import item_selector
 from common.util import xpath_class, lot2dol, flatten, lmap
 
 
@@ -78,20 +79,20 @@ class EuropeanBiotechnologyEventPipeline(object):
                 country = None
             return city, country
 
-        res = scrapy.Selector(text=item['body'])
+        res = item_selector(item)
 
         name = res.xpath(
-            f"//div[{xpath_class(['ce-inner-headline'])}]//span/text()").get()
+            f".//div[{xpath_class(['ce-inner-headline'])}]//span/text()").get()
         desc = res.xpath(
-            f"normalize-space(string(//div[{xpath_class(['ce-inner-text'])}]/p))").get()
+            f"normalize-space(string(.//div[{xpath_class(['ce-inner-text'])}]/p))").get()
         start = res.xpath(
-            f"//span[{xpath_class(['event-date'])} and position()=1]/text()").get()
+            f".//span[{xpath_class(['event-date'])} and position()=1]/text()").get()
         end = res.xpath(
-            f"//span[{xpath_class(['event-date'])} and position()=2]/text()").get()
+            f".//span[{xpath_class(['event-date'])} and position()=2]/text()").get()
         event_url = res.xpath(
-            f"//div[{xpath_class(['ce-inner-url'])}]/a/@href").get()
+            f".//div[{xpath_class(['ce-inner-url'])}]/a/@href").get()
         city = res.xpath(
-            f"//span[{xpath_class(['event-location'])}]/text()").get('')
+            f".//span[{xpath_class(['event-location'])}]/text()").get('')
 
         description, contacts = parse_description(desc)
         emails = ' '.join(contacts.get('email', []))
@@ -1,11 +1,12 @@
 import scrapy
 
+from common.components import SpeculativePaginationMixin
 from common.util import xpath_class
 
 from event.items import ResponseItem
 
 
-class EuropeanBiotechnologyEventSpider(scrapy.Spider):
+class EuropeanBiotechnologyEventSpider(SpeculativePaginationMixin):
 
     name = 'european_biotechnology_event'
     base_url = 'https://european-biotechnology.com'
@@ -25,16 +26,17 @@ class EuropeanBiotechnologyEventSpider(scrapy.Spider):
     }
 
     def start_requests(self):
-        yield scrapy.Request(f'{self.base_url}{self.events_path}')
+        yield scrapy.Request(f'{self.base_url}{self.events_path}',
+                             meta={'listing': True})
 
     def parse(self, response: scrapy.http.Response, **kwargs):
         next_page_url = response.xpath(
             f'//li[{xpath_class(["next"])}]/a/@href').get()
-        if next_page_url is not None:
-            yield scrapy.Request(f'{self.base_url}{next_page_url}')
-
         entries = response.xpath(
-            f'//article[{xpath_class(["event"])}]').getall()
+            f'//article[{xpath_class(["event"])}]')
+
+        yield from self.paginate(response, next_page_url, bool(entries),
+                                 meta={'listing': True})
 
         for entry in entries:
-            yield ResponseItem({'body': entry, 'meta': response.meta})
+            yield ResponseItem({'body': entry.get(), 'meta': response.meta})
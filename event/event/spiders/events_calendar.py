@@ -2,37 +2,110 @@
 Spider for WP sites that use The Events Calendar by Modern Tribe (https://theeventscalendar.com/)
 '''
 
+from datetime import datetime
+from urllib import parse
+
 import scrapy
 import scrapy.http
 
+from common.components import SpeculativePaginationMixin
 import common.util as util
 
 from event.items import ResponseItem
 
 
-class EventsCalendarSpider(scrapy.Spider):
+class EventsCalendarSpider(SpeculativePaginationMixin):
     '''
-    Spider that scrapes event entries from WP sites that use 
+    Spider that scrapes event entries from WP sites that use
     The Events Calendar by Modern Tribe (https://theeventscalendar.com/)
 
     Spider expects two properties:
     - base_url: `str` Base url of the website
-    - events_path: `str` Relative path to the events page 
+    - events_path: `str` Relative path to the events page
+
+    Optional properties:
+    - use_api: `bool` Fetch events from the plugin's REST API instead of
+               crawling the HTML pages. Falls back to the HTML pages if
+               the API is not available. Can be passed also as spider
+               argument (`-a use_api=true`). Default: `False`
+    - api_path: `str` Relative path to the REST API events endpoint
+    - api_per_page: `int` Number of events fetched per API request
     '''
 
+    use_api = False
+    api_path = '/wp-json/tribe/events/v1/events'
+    api_per_page = 50
+
+    def __init__(self, use_api=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if use_api is not None:
+            self.use_api = str(use_api).lower() in ('1', 'true', 'yes')
+
     def start_requests(self):
-        yield scrapy.Request(f'{self.base_url}{self.events_path}')
+        if self.use_api:
+            yield self.api_request(page=1)
+        else:
+            yield self.html_request()
+
+    def html_request(self):
+        return scrapy.Request(f'{self.base_url}{self.events_path}',
+                              meta={'listing': True})
+
+    def api_request(self, page):
+        query = parse.urlencode({
+            'per_page': self.api_per_page,
+            'page': page,
+            'start_date': datetime.now().strftime('%Y-%m-%d'),
+        })
+        return scrapy.Request(f'{self.base_url}{self.api_path}?{query}',
+                              callback=self.parse_api, errback=self.api_failed,
+                              meta={'api_page': page, 'listing': True})
 
     def parse(self, response: scrapy.http.Response, **kwargs):
         next_page_url = response.xpath('//a[@rel="next"]/@href').get()
-        if next_page_url is not None:
-            yield scrapy.Request(next_page_url)
-
         entry_urls = response.xpath(
             f'//div[{util.xpath_class(["type-tribe_events"])}]//*[{util.xpath_class(["tribe-events-list-event-title"])}]/a/@href').getall()
 
+        yield from self.paginate(response, next_page_url, bool(entry_urls),
+                                 meta={'listing': True})
+
         for url in entry_urls:
             yield scrapy.Request(url, callback=self.parse_entry)
 
     def parse_entry(self, response: scrapy.http.Response, **kwargs):
         yield ResponseItem({'body': response.text, 'meta': response.meta})
+
+    def parse_api(self, response: scrapy.http.Response, **kwargs):
+        page = response.meta['api_page']
+        members = util.iter_json_members(response.text, stream=['events'])
+        has_events = False
+        try:
+            for key, value in members:
+                if key == 'events':
+                    has_events = True
+                    yield ResponseItem({'body': value, 'url': value.get('url'),
+                                        'meta': response.meta})
+                elif key == 'total_pages' and page == 1:
+                    # Number of pages is known from the first page, so
+                    # the remaining pages are requested all at once
+                    for next_page in range(2, (value or 1) + 1):
+                        yield self.api_request(page=next_page)
+        except ValueError:
+            # HTML pages would yield events of this page again
+            if page != 1 or has_events:
+                raise
+            self.logger.warning('Events API response of "{}" is not valid '
+                                'JSON, crawling HTML pages instead'.format(
+                                    self.base_url))
+            yield self.html_request()
+
+    def api_failed(self, failure):
+        if failure.request.meta.get('api_page') != 1:
+            self.logger.error('Failed to fetch events API page "{}". '
+                              'Reason: {}'.format(failure.request.url,
+                                                  failure.value))
+            return
+        self.logger.warning('Events API of "{}" is not available, crawling '
+                            'HTML pages instead. Reason: {}'.format(
+                                self.base_url, failure.value))
+        yield self.html_request()
@@ -53,12 +53,14 @@ class GlobalScienceMeetingsEventPipeline(object):
             return name, email, number
 
         row_index = item['meta']['row_index']
-        res = scrapy.Selector(text=item['body'])
+        res = util.item_selector(item)
 
         row_selector = f'//table[@id="grdSQL"]//tr[descendant::a[contains(@href, "SysRowSelector${row_index}")]]'
         data_selector = '/td[@align]'
-        data = res.xpath(f'{row_selector}{data_selector}').getall()
-        text_data = [scrapy.Selector(text=d).xpath('//font/text()').get('').strip()
+        # Query the cells in place instead of serializing each cell and
+        # parsing it again
+        data = res.xpath(f'{row_selector}{data_selector}')
+        text_data = [d.xpath('.//font/text()').get('').strip()
                      for d in data]
 
         description, contacts = parseDescription(text_data[5])
@@ -69,8 +71,7 @@ class GlobalScienceMeetingsEventPipeline(object):
         event = EventItem()
 
         event['name'] = text_data[0]
-        event['event_url'] = scrapy.Selector(text=data[5]
-                                             ).xpath('//font/a/@href').get()
+        event['event_url'] = data[5].xpath('.//font/a/@href').get()
         event['description'] = re.sub(r'\n|\r', ' ', description)
 
         # event['focus'] = scrapy.Field()
@@ -7,6 +7,7 @@ class LabiotechEventSpider(EventsCalendarSpider):
     base_url = 'https://www.labiotech.eu'
     events_path = '/events/list/'
     source = 'Labiotech'
+    use_api = True
     custom_settings = {
         'ITEM_PIPELINES': {
             'event.spiders.labiotech.pipelines.LabiotechEventPipeline': 400,
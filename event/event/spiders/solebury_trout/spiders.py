@@ -9,12 +9,13 @@ Scrapy spiders docs: https://docs.scrapy.org/en/latest/topics/spiders.html
 import scrapy
 import scrapy.http
 
+from common.components import ListingChangeDetectionMixin
 import common.util as util
 
 from event.items import ResponseItem
 
 
-class SoleburyTroutEventSpider(scrapy.Spider):
+class SoleburyTroutEventSpider(ListingChangeDetectionMixin):
 
     name = 'solebury_trout_event'
     base_url = 'https://www.soleburytrout.com'
@@ -22,6 +23,8 @@ class SoleburyTroutEventSpider(scrapy.Spider):
     custom_settings = {
         'URLLENGTH_LIMIT': 5000,  # needed to accept all the event IDs in query params
         'SPIDER_MIDDLEWARES': {
+            'event.spider_middleware.StartRequestShardMiddleware': 50,
+            'event.spider_middleware.ResponseItemCompactorMiddleware': 100,
             'event.spider_middleware.OutputCSVParserMiddleware': 900,
         },
         'ITEM_PIPELINES': {
@@ -47,4 +50,9 @@ class SoleburyTroutEventSpider(scrapy.Spider):
         yield scrapy.Request(csv_url, callback=self.parse_csv)
 
     def parse_csv(self, response: scrapy.http.Response, **kwargs):
-        yield ResponseItem({'body': response.text, 'meta': response.meta})
+        self.detect_listing_change(response.body)
+
+        # Raw body is passed, so the CSV is parsed straight from the response
+        # buffer without decoding it as a whole first
+        yield ResponseItem({'body': response.body, 'encoding': response.encoding,
+                            'meta': response.meta})
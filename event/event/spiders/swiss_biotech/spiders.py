@@ -1,8 +1,4 @@
-from collections import deque
-import time
-
 import scrapy
-from selenium.common.exceptions import NoSuchElementException
 
 from common.util import xpath_class
 from common.components import SeleniumSpiderMixin
@@ -32,44 +28,40 @@ class SwissBiotechEventSpider(SeleniumSpiderMixin):
     }
 
     def start_requests(self):
-        def parse_page(webdriver):
-            pages = deque([])
-            data = []  # list of tuples (url, organizer)
-            while True:
-                entry_links = webdriver.find_elements_by_xpath(
-                    f'//div[@id="finderListings"]//div[{xpath_class(["grid-item"])}]//div[{xpath_class(["lf-item"])}]//a')
-                entry_urls = [link.get_attribute('href')
-                              for link in entry_links]
-                # Sometimes, host info is missing in the entry page, so scrape it here
-                organizers = [
-                    o.text.split(':')[-1]
-                    for o in webdriver.find_elements_by_xpath(
-                        f'//ul[{xpath_class(["details-list"])}]//span')
-                ]
-
-                data.extend(zip(entry_urls, organizers))
+        yield self.listing_request(f'{self.base_url}{self.events_path}',
+                                   first_page=True)
 
-                try:
-                    next_page_el = webdriver.find_element_by_xpath(
-                        f'//nav[{xpath_class(["job-manager-pagination"])}]//a[@data-page and text()="→"]')
-                    next_page_num = next_page_el.get_attribute('data-page')
-                    pages.append(
-                        f'{self.base_url}{self.events_path}?pg={next_page_num}')
-                except NoSuchElementException:
-                    pass
+    def listing_request(self, url, first_page=False):
+        # Listing is rendered by JS, so it's loaded in a browser
+        render = {
+            'wait_for': f'//div[@id="finderListings"]//div[{xpath_class(["lf-item"])}]',
+        }
+        return scrapy.Request(url, callback=self.parse_listing,
+                              meta={'render': render, 'listing': True,
+                                    'first_page': first_page})
 
-                if len(pages) == 0:
-                    break
-                webdriver.get(pages.popleft())
-                time.sleep(1)
-            return data
+    def parse_listing(self, response: scrapy.http.Response, **kwargs):
+        entry_urls = response.xpath(
+            f'//div[@id="finderListings"]//div[{xpath_class(["grid-item"])}]//div[{xpath_class(["lf-item"])}]//a/@href').getall()
+        # Sometimes, host info is missing in the entry page, so scrape it here
+        organizers = [
+            o.xpath('string()').get().split(':')[-1]
+            for o in response.xpath(
+                f'//ul[{xpath_class(["details-list"])}]//span')
+        ]
 
-        task_results = self.run_webdriver_tasks(self.webdriver, tasks=[parse_page],
-                                                start_url=f'{self.base_url}{self.events_path}')
-        entry_data = task_results[0]
+        if response.meta.get('first_page'):
+            # Number of pages is known from the first page, so the remaining
+            # pages are rendered in parallel
+            page_numbers = response.xpath(
+                f'//nav[{xpath_class(["job-manager-pagination"])}]//a/@data-page').re(r'^\d+$')
+            last_page = max(map(int, page_numbers), default=1)
+            for page in range(2, last_page + 1):
+                yield self.listing_request(
+                    f'{self.base_url}{self.events_path}?pg={page}')
 
-        for url, organizer in entry_data:
-            yield scrapy.Request(url, meta={'organizer': organizer})
+        for url, organizer in zip(entry_urls, organizers):
+            yield response.follow(url, meta={'organizer': organizer})
 
     def parse(self, response: scrapy.http.Response, **kwargs):
         yield ResponseItem({'body': response.text, 'meta': response.meta})
@@ -14,6 +14,7 @@ import pycountry
 import scrapy
 
 from event.items import EventItem, ResponseItem
+from event.util import item_selector
 from common.util import xpath_class, lmap
 
 
@@ -43,20 +44,20 @@ class UKBiotechDatabaseEventPipeline(object):
                 city = loc
             return city, country
 
-        res = scrapy.Selector(text=item['body'])
+        res = item_selector(item)
 
         name = res.xpath(
-            f"//div[{xpath_class(['event_title'])}]/h3/text()").get()
+            f".//div[{xpath_class(['event_title'])}]/h3/text()").get()
         venue, location, _, desc, *__ = res.xpath(
-            f"//div[{xpath_class(['event_desc'])}]").get('<br><br><br>').split('<br>')
+            f".//div[{xpath_class(['event_desc'])}]").get('<br><br><br>').split('<br>')
         start, end = res.xpath(
-            f"//div[{xpath_class(['event_date'])}]/b/text()").get('').split('-')
+            f".//div[{xpath_class(['event_date'])}]/b/text()").get('').split('-')
         contact_name = res.xpath(
-            f"//div[{xpath_class(['event_desc', 'event_contact'], operator='and')}]").get('<br>')
+            f".//div[{xpath_class(['event_desc', 'event_contact'], operator='and')}]").get('<br>')
         contact_email = res.xpath(
-            f"//div[{xpath_class(['event_desc', 'event_contact'], operator='and')}]/a/@href").get('')
+            f".//div[{xpath_class(['event_desc', 'event_contact'], operator='and')}]/a/@href").get('')
         event_url = res.xpath(
-            f"//div[{xpath_class(['event_web'])}]/a/@href").get()
+            f".//div[{xpath_class(['event_web'])}]/a/@href").get()
 
         if "<br>" in contact_name:
             contact_name = contact_name.split('<br>')[0].split('>')[-1]
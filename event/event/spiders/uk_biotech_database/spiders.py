@@ -1,11 +1,12 @@
 import scrapy
 
+from common.components import ListingChangeDetectionMixin
 from common.util import xpath_class
 
 from event.items import ResponseItem
 
 
-class UKBiotechDatabaseEventSpider(scrapy.Spider):
+class UKBiotechDatabaseEventSpider(ListingChangeDetectionMixin):
 
     name = 'uk_biotech_database_event'
     base_url = 'http://www.ukbiotech.com'
@@ -30,7 +31,8 @@ class UKBiotechDatabaseEventSpider(scrapy.Spider):
 
     def parse(self, response: scrapy.http.Response, **kwargs):
         entries = response.xpath(
-            f'//div[{xpath_class(["event"])}]').getall()
+            f'//div[{xpath_class(["event"])}]')
+        self.detect_listing_change(entries)
 
         for entry in entries:
-            yield ResponseItem({'body': entry, 'meta': response.meta})
+            yield ResponseItem({'body': entry.get(), 'meta': response.meta})
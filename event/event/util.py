@@ -1,8 +1,15 @@
 import argparse
+import codecs
 import csv
 import datetime
+import html
+import io
+import json
 import re
 
+import scrapy
+from w3lib.html import remove_tags
+
 
 def event_id(event):
     def normalize(s):
@@ -11,6 +18,113 @@ def event_id(event):
     return f'{normalize(event["name"])}__{normalize(event["city"])}__{event["start"]}'
 
 
+def item_selector(item):
+    '''
+    Get a selector over the HTML held by a ResponseItem.
+
+    Spiders that yield fragments of a listing page pass only the HTML of the
+    fragment (`selector.get()`) as `item['body']`, not the selector, which
+    would keep the whole parsed page in memory until the pipelines finish.
+
+    XPath queries on the returned selector should be relative (`.//`).
+    '''
+    return scrapy.Selector(text=item['body'])
+
+
+def html_to_text(s):
+    '''
+    Strip tags and HTML entities (also escaped ones, such as `&lt;p&gt;`)
+    from `s` and normalize whitespace.
+    '''
+    if s is None:
+        return None
+    text = html.unescape(remove_tags(html.unescape(s)))
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def jsonld_events(sel):
+    '''
+    Get schema.org Event objects (or its subtypes, such as BusinessEvent)
+    embedded in a page as JSON-LD (`<script type="application/ld+json">`).
+    '''
+    events = []
+    scripts = sel.xpath('.//script[@type="application/ld+json"]/text()').getall()
+    for script in scripts:
+        try:
+            data = json.loads(script)
+        except ValueError:
+            continue
+        queue = data if isinstance(data, list) else [data]
+        while queue:
+            obj = queue.pop(0)
+            if not isinstance(obj, dict):
+                continue
+            graph = obj.get('@graph', [])
+            queue.extend(graph if isinstance(graph, list) else [graph])
+            types = obj.get('@type', [])
+            types = types if isinstance(types, list) else [types]
+            if any(isinstance(t, str) and t.endswith('Event') for t in types):
+                events.append(obj)
+    return events
+
+
+def jsonld_event_fields(data):
+    '''
+    Map schema.org Event object to EventItem fields. Only fields that have
+    a value in `data` are returned.
+    '''
+
+    def first(value):
+        if isinstance(value, list):
+            return value[0] if value else None
+        return value
+
+    def text(value):
+        value = first(value)
+        if isinstance(value, dict):
+            value = value.get('name')
+        if value is None or isinstance(value, (dict, list)):
+            return None
+        return html_to_text(str(value))
+
+    def date(value):
+        value = text(value)
+        try:
+            return datetime.datetime.strptime(value[:10], '%Y-%m-%d')
+        except (TypeError, ValueError):
+            return None
+
+    location = first(data.get('location'))
+    address = location.get('address') if isinstance(location, dict) else None
+    if not isinstance(address, dict):
+        address = {}
+    offers = first(data.get('offers'))
+    if not isinstance(offers, dict):
+        offers = {}
+    organizer = first(data.get('organizer'))
+    if not isinstance(organizer, dict):
+        organizer = {'name': organizer}
+
+    fields = {
+        'name': text(data.get('name')),
+        'event_url': text(data.get('url')),
+        'description': text(data.get('description')),
+        'start': date(data.get('startDate')),
+        'end': date(data.get('endDate')),
+        'country': text(address.get('addressCountry')),
+        'state': text(address.get('addressRegion')),
+        'city': text(address.get('addressLocality')),
+        'venue': text(location),
+        'price': text(offers.get('price', offers.get('lowPrice'))),
+        'currency': text(offers.get('priceCurrency')),
+        'contact_email': text(organizer.get('email')),
+        'contact_phone': text(organizer.get('telephone')),
+        'organizer': text(organizer.get('name')),
+        'organizer_url': text(organizer.get('url')),
+    }
+    return {k: v for k, v in fields.items() if v not in (None, '')}
+
+
 def formatDate(dt: datetime.datetime):
     return dt.strftime('%Y-%m-%d')
 
@@ -22,6 +136,36 @@ def dateDuration(start, end):
     return total_days
 
 
+def iter_csv_rows(body, encoding=None):
+    '''
+    Lazily parse CSV `body` (`bytes` or `str`) into dicts keyed by the
+    header row.
+
+    `bytes` body is decoded incrementally from a buffer that shares memory
+    with the body, so the body is never copied as a whole.
+    '''
+    if isinstance(body, bytes):
+        encoding = encoding or 'utf-8'
+        # Skip BOM if present
+        if codecs.lookup(encoding).name == 'utf-8':
+            encoding = 'utf-8-sig'
+        lines = io.TextIOWrapper(io.BytesIO(body), encoding=encoding,
+                                 newline='')
+    else:
+        lines = _iter_lines(body)
+    return csv.DictReader(lines)
+
+
+def _iter_lines(text):
+    start = 0
+    while start < len(text):
+        end = text.find('\n', start)
+        if end == -1:
+            end = len(text) - 1
+        yield text[start:end + 1]
+        start = end + 1
+
+
 def merge_csvs(inputs, output):
     '''
     Taken from https://stackoverflow.com/a/26599697/9788634